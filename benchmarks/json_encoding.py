@@ -0,0 +1,132 @@
+"""
+Compare JSON encoding of /list and /search payloads: FastAPI's default path
+(jsonable_encoder + stdlib json, as JSONResponse renders it) against orjson.
+
+Rows mirror TransmissionClient.get_torrents and the raw Jackett results returned
+by search_audiobook. Reports the best encode time and the peak memory allocated
+during one encode (tracemalloc) at 100, 1,000 and 10,000 rows.
+
+Usage: python benchmarks/json_encoding.py [rows ...]
+"""
+
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+try:
+    from fastapi.encoders import jsonable_encoder
+except ImportError:
+    jsonable_encoder = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def torrent_row(i):
+    user = f"user{i % 5}"
+    return {
+        "id": i,
+        "labels": ["audiobook", user, f"username:{user}"],
+        "name": f"Author {i % 97} - Some Long Audiobook Title {i}",
+        "status": random.choice(["Stopped", "Downloading", "Seeding"]),
+        "total_size": random.randint(100_000_000, 3_000_000_000),
+        "percent_done": round(random.random() * 100, 2),
+        "downloaded_ever": random.randint(0, 10**9),
+        "uploaded_ever": random.randint(0, 10**9),
+        "added_date": 1_700_000_000 + i,
+        "activity_date": 1_700_100_000 + i,
+        "use_beets_import": False,
+        "imported": False,
+        "importError": False,
+        "eta": random.randint(-1, 100_000),
+        "candidates": [],
+        "hash_string": f"{i:040x}",
+        "added_by": user,
+        "upload_ratio": round(random.random() * 3, 2),
+    }
+
+
+def search_row(i):
+    return {
+        "FirstSeen": "0001-01-01T00:00:00",
+        "Tracker": "AudioBook Bay",
+        "TrackerId": "audiobookbay",
+        "TrackerType": "public",
+        "CategoryDesc": "Audio/Audiobook",
+        "BlackholeLink": None,
+        "Title": f"Author {i % 97} - Some Long Audiobook Title {i} (Unabridged)",
+        "Guid": f"https://audiobookbay.example/abss/title-{i}/",
+        "Link": f"http://jackett:9117/dl/audiobookbay/?jackett_apikey=abc&path=xyz{i}&file=Title+{i}",
+        "Details": f"https://audiobookbay.example/abss/title-{i}/",
+        "PublishDate": "2024-05-01T12:00:00+00:00",
+        "Category": [3030, 100037],
+        "Size": random.randint(100_000_000, 3_000_000_000),
+        "Files": None,
+        "Grabs": None,
+        "Description": None,
+        "RageID": None,
+        "TVDBId": None,
+        "Imdb": None,
+        "TMDb": None,
+        "Author": None,
+        "BookTitle": None,
+        "Seeders": random.randint(0, 500),
+        "Peers": random.randint(0, 600),
+        "Poster": f"https://audiobookbay.example/images/{i}.jpg",
+        "InfoHash": f"{i:040X}",
+        "MagnetUri": None,
+        "MinimumRatio": None,
+        "MinimumSeedTime": None,
+        "DownloadVolumeFactor": 0.0,
+        "UploadVolumeFactor": 1.0,
+        "Gain": 0.0,
+    }
+
+
+def stdlib_default(rows):
+    # What JSONResponse.render does after FastAPI runs the content through jsonable_encoder
+    content = jsonable_encoder(rows) if jsonable_encoder else rows
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def orjson_direct(rows):
+    return orjson.dumps(rows)
+
+
+def measure(encode, rows, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        encode(rows)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    size = len(encode(rows))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1000, peak / 1024, size / 1024
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [100, 1_000, 10_000]
+    random.seed(1)
+    encoders = [("jsonable_encoder + json" if jsonable_encoder else "json (fastapi not installed)", stdlib_default)]
+    if orjson:
+        encoders.append(("orjson", orjson_direct))
+    else:
+        print("orjson not installed - only the default path is measured")
+
+    for label, make_row in (("/list (torrent rows)", torrent_row), ("/search (Jackett results)", search_row)):
+        print(label)
+        for count in counts:
+            rows = [make_row(i) for i in range(count)]
+            for name, encode in encoders:
+                ms, peak_kib, size_kib = measure(encode, rows)
+                print(f"  {count:>6} rows  {name:<28} {ms:9.2f} ms  peak {peak_kib:9.1f} KiB  body {size_kib:9.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Accuracy and throughput of the Goodreads match scorer (abb.scoring).
+
+Accuracy runs over the labeled cases in fixtures/match_cases.json. Each case is a
+Goodreads book, the Jackett results for it, and the index of the right release, or
+null when none of them should be downloaded. A case is correct when the scorer picks
+the labeled release with a confidence at or above the threshold, or, for null cases,
+when the best confidence stays below it. The old behaviour (always take results[0])
+is reported alongside.
+
+Cases are split into "tuning", the set the weights and threshold were chosen on, and
+"held-out", labeled afterwards and never tuned against. Only the held-out figure says
+how the scorer does on books it hasn't seen.
+
+Throughput scores the fixture results repeated up to 10, 100 and 1,000 rows per book.
+
+Usage: python benchmarks/match_scoring.py [threshold] [rows ...]
+"""
+
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, "..", "source"))
+
+from abb.scoring import best_match, score_results  # noqa: E402
+
+# Same default as MATCH_EXCLUDED_KEYWORDS in constants.py
+EXCLUDED = (
+    "abridged,dramatized,dramatised,dramatization,dramatisation,ebook,epub,pdf,mobi,azw3,sample,excerpt,summary,"
+    "german,deutsch,french,spanish,italian,russian"
+).split(",")
+
+
+def load_cases():
+    with open(os.path.join(ROOT, "fixtures", "match_cases.json")) as f:
+        return json.load(f)
+
+
+def accuracy(cases, threshold):
+    scored = first = 0
+    for case in cases:
+        expected = case["expected"]
+        match, confidence = best_match(case["book"], case["results"], EXCLUDED)
+        picked = case["results"].index(match) if match is not None and confidence >= threshold else None
+        ok = picked == expected
+        scored += ok
+        # results[0] was always downloaded, so it can never get a "none of these" case right
+        first += expected == 0
+        if not ok:
+            print(f"  miss: {case['name']}: picked {picked} ({confidence:.2f}), expected {expected}")
+    return scored / len(cases), first / len(cases)
+
+
+def throughput(cases, rows, repeat=5):
+    books = [(case["book"], (case["results"] * rows)[:rows]) for case in cases]
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for book, results in books:
+            score_results(book, results, EXCLUDED)
+        best = min(best, time.perf_counter() - started)
+    return len(books) * rows / best
+
+
+def main():
+    threshold = float(sys.argv[1]) if len(sys.argv) > 1 else 0.6
+    counts = [int(arg) for arg in sys.argv[2:]] or [10, 100, 1_000]
+    cases = load_cases()
+
+    for split in ("tuning", "held-out"):
+        subset = [case for case in cases if case["split"] == split]
+        print(f"Accuracy over {len(subset)} {split} cases (threshold {threshold})")
+        scored, first = accuracy(subset, threshold)
+        print(f"  scorer      {scored:6.1%}")
+        print(f"  results[0]  {first:6.1%}")
+
+    print("Throughput")
+    for rows in counts:
+        print(f"  {rows:>6} results per book  {throughput(cases, rows):12,.0f} results/s")
+
+
+if __name__ == "__main__":
+    main()
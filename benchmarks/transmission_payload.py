@@ -0,0 +1,91 @@
+"""
+Compare Transmission torrent-get listing payloads before and after the lean projection.
+
+Builds a synthetic seedbox (multi-chapter audiobooks, one file per chapter) and
+measures the response size and JSON parse time of:
+
+  - the old listing: object format, every field including "files"
+  - the new listing: format=table, no "files"
+
+Usage: python benchmarks/transmission_payload.py [torrents] [files_per_torrent]
+"""
+
+import json
+import random
+import sys
+import time
+
+OLD_FIELDS = [
+    "id", "name", "status", "labels", "totalSize", "percentDone",
+    "downloadedEver", "uploadedEver", "addedDate", "activityDate", "uploadRatio",
+    "files", "eta", "hashString"
+]
+NEW_FIELDS = [field for field in OLD_FIELDS if field != "files"]
+
+
+def make_torrent(torrent_id, files_per_torrent):
+    name = f"Author_{torrent_id % 97} - Some.Long+Audiobook_Title {torrent_id}"
+    files = [
+        {
+            "name": f"{name}/Chapter {chapter:03d} - {name}.mp3",
+            "length": random.randint(5_000_000, 60_000_000),
+            "bytesCompleted": random.randint(0, 60_000_000),
+        }
+        for chapter in range(1, files_per_torrent + 1)
+    ]
+    return {
+        "id": torrent_id,
+        "name": name,
+        "status": random.choice([0, 4, 6]),
+        "labels": ["audiobook", f"user{torrent_id % 5}", f"username:user{torrent_id % 5}"],
+        "totalSize": sum(f["length"] for f in files),
+        "percentDone": round(random.random(), 4),
+        "downloadedEver": random.randint(0, 10**9),
+        "uploadedEver": random.randint(0, 10**9),
+        "addedDate": 1_700_000_000 + torrent_id,
+        "activityDate": 1_700_100_000 + torrent_id,
+        "uploadRatio": round(random.random() * 3, 4),
+        "files": files,
+        "eta": random.randint(-1, 100_000),
+        "hashString": f"{torrent_id:040x}",
+    }
+
+
+def old_payload(torrents):
+    rows = [{field: t[field] for field in OLD_FIELDS} for t in torrents]
+    return json.dumps({"arguments": {"torrents": rows}, "result": "success"})
+
+
+def new_payload(torrents):
+    rows = [NEW_FIELDS] + [[t[field] for field in NEW_FIELDS] for t in torrents]
+    return json.dumps({"arguments": {"torrents": rows}, "result": "success"})
+
+
+def parse_time(payload, table, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        torrents = json.loads(payload)["arguments"]["torrents"]
+        if table:
+            fields = torrents[0]
+            torrents = [dict(zip(fields, row)) for row in torrents[1:]]
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    files_per_torrent = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    random.seed(1)
+    torrents = [make_torrent(i, files_per_torrent) for i in range(1, count + 1)]
+
+    old = old_payload(torrents)
+    new = new_payload(torrents)
+    print(f"{count} torrents, {files_per_torrent} files each")
+    print(f"  before (objects + files): {len(old) / 1024:10.1f} KiB  parse {parse_time(old, False):8.1f} ms")
+    print(f"  after  (table, no files): {len(new) / 1024:10.1f} KiB  parse {parse_time(new, True):8.1f} ms")
+    print(f"  reduction: {len(old) / len(new):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,16 @@
-import requests
-from typing import Optional
-from .constants import JACKETT_API_KEY, JACKETT_API_URL
+import asyncio
+import hashlib
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from .constants import (
+    JACKETT_API_KEY, JACKETT_API_URL, SEARCH_CACHE_TTL, SEARCH_CACHE_MAX_BYTES, SINGLE_FLIGHT_WAIT
+)
+from .search_index import get_search_index
+from .singleflight import AsyncSingleFlight, SingleFlight
+from .upstream import async_request, get_session
 from .utils import custom_logger
 
 logger = custom_logger(__name__)
@@ -9,7 +19,7 @@ def get_jackett_magnet(url):
     try:
         if url.startswith("magnet:"):
             return url
-        response = requests.get(url, allow_redirects=False)
+        response = get_session("jackett").get(url, allow_redirects=False)
         if response.status_code in [301, 302]:
             return response.headers.get("Location", url)
     except Exception as e:
@@ -17,26 +27,231 @@ def get_jackett_magnet(url):
         return url
     return url
 
-def search_audiobook(query, api_url: Optional[str] = None, api_key: Optional[str] = None):
-    url = api_url or JACKETT_API_URL
-    key = api_key or JACKETT_API_KEY
-    
-    params = {
-        "apikey": key,
+class SearchCache:
+    """LRU cache of Jackett results bounded by total response size, with a TTL per entry"""
+
+    def __init__(self, ttl: int, max_bytes: int):
+        self.ttl = int(ttl)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, int, List[Dict[str, Any]]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(query: str, api_url: str, api_key: str) -> Tuple[str, str, str]:
+        """Normalized query plus the indexer settings it was run against (the key itself is hashed)"""
+        normalized = " ".join(query.casefold().split())
+        key_hash = hashlib.sha256(api_key.encode()).hexdigest()[:16] if api_key else ""
+        return (normalized, api_url.rstrip("/"), key_hash)
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            if entry is not None:
+                self._evict(key)
+            self.misses += 1
+            return None
+
+    def put(self, key: Tuple[str, str, str], results: List[Dict[str, Any]], size: int) -> None:
+        if self.ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, results)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: Tuple[str, str, str]) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def contains(self, key: Tuple[str, str, str]) -> bool:
+        """Whether key has a live entry, without touching LRU order or the counters"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] > time.monotonic()
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+            return count
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+search_cache = SearchCache(SEARCH_CACHE_TTL, SEARCH_CACHE_MAX_BYTES)
+_search_flight = SingleFlight(SINGLE_FLIGHT_WAIT)
+_async_search_flight = AsyncSingleFlight(SINGLE_FLIGHT_WAIT)
+
+def _search_params(query, api_key):
+    return {
+        "apikey": api_key,
         "Query": query,
         "Category": "audiobooks"
     }
+
+def _fetch_results(query, url, key, cache_key):
+    params = _search_params(query, key)
     logger.info(f"Searching for {query}...")
 
     try:
-        response = requests.get(str(url), params=params)
+        response = get_session("jackett").get(str(url), params=params)
         if response.status_code != 200:
-            logger.error("Error fetching results from Jackett:", response.text)
+            logger.error(f"Error fetching results from Jackett: {response.text}")
             return []
 
-        results = response.json()
-        logger.info(f"Found {len(results.get('Results', []))} results for {query}")
-        return results.get("Results", [])
+        results = response.json().get("Results", [])
+        search_cache.put(cache_key, results, len(response.content))
+        get_search_index().record(results)
+        logger.info(f"Found {len(results)} results for {query}")
+        return results
     except Exception as e:
         logger.error(f"Search failed: {e}")
         return []
+
+async def _async_fetch_results(query, url, key, cache_key):
+    params = _search_params(query, key)
+    logger.info(f"Searching for {query}...")
+
+    try:
+        response = await async_request("jackett", "GET", str(url), params=params)
+        if response.status_code != 200:
+            logger.error(f"Error fetching results from Jackett: {response.text}")
+            return []
+
+        results = response.json().get("Results", [])
+        search_cache.put(cache_key, results, len(response.content))
+        await asyncio.get_running_loop().run_in_executor(None, get_search_index().record, results)
+        logger.info(f"Found {len(results)} results for {query}")
+        return results
+    except Exception as e:
+        logger.error(f"Search failed: {e}")
+        return []
+
+def search_audiobook(query, api_url: Optional[str] = None, api_key: Optional[str] = None, use_cache: bool = True):
+    url = api_url or JACKETT_API_URL
+    key = api_key or JACKETT_API_KEY
+
+    cache_key = search_cache.key(query, str(url), key or "")
+    if use_cache:
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Found {len(cached)} cached results for {query}")
+            return list(cached)
+
+    # Identical searches already in flight share that Jackett call
+    return list(_search_flight.do(cache_key, _fetch_results, query, url, key, cache_key))
+
+async def async_search_audiobook(query, api_url: Optional[str] = None, api_key: Optional[str] = None, use_cache: bool = True):
+    """search_audiobook for the event loop, using the shared async transport"""
+    url = api_url or JACKETT_API_URL
+    key = api_key or JACKETT_API_KEY
+
+    cache_key = search_cache.key(query, str(url), key or "")
+    if use_cache:
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Found {len(cached)} cached results for {query}")
+            return list(cached)
+
+    return list(await _async_search_flight.do(cache_key, _async_fetch_results, query, url, key, cache_key))
+
+# Configured indexers change rarely, so the list is fetched at most every few minutes
+INDEXER_LIST_TTL = 300
+_indexer_lists: Dict[str, Tuple[float, List[Dict[str, str]]]] = {}
+
+def _indexer_url(api_url: str, indexer_id: str) -> Optional[str]:
+    """Results URL for one indexer, derived from the aggregate .../indexers/all/results URL"""
+    marker = "/indexers/all/results"
+    if marker not in api_url:
+        return None
+    return api_url.replace(marker, f"/indexers/{indexer_id}/results")
+
+async def list_indexers(api_url: Optional[str] = None, api_key: Optional[str] = None) -> List[Dict[str, str]]:
+    """Configured Jackett indexers as [{"id", "name"}], or [] if they can't be listed"""
+    url = str(api_url or JACKETT_API_URL)
+    key = api_key or JACKETT_API_KEY
+    cached = _indexer_lists.get(url)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    torznab_url = _indexer_url(url, "all")
+    if torznab_url is None:
+        return []
+    try:
+        response = await async_request(
+            "jackett", "GET", torznab_url + "/torznab/api",
+            params={"apikey": key, "t": "indexers", "configured": "true"}
+        )
+        if response.status_code != 200:
+            logger.error(f"Error listing Jackett indexers: {response.status_code}")
+            return []
+        root = ET.fromstring(response.content)
+        indexers = [
+            {"id": node.get("id"), "name": node.findtext("title") or node.get("id")}
+            for node in root.iter("indexer") if node.get("id")
+        ]
+    except Exception as e:
+        logger.error(f"Listing Jackett indexers failed: {e}")
+        return []
+    _indexer_lists[url] = (time.monotonic() + INDEXER_LIST_TTL, indexers)
+    return indexers
+
+async def stream_search(query, use_cache: bool = True) -> AsyncIterator[Dict[str, Any]]:
+    """Search every configured indexer concurrently, yielding each one's results as it answers.
+
+    Yields {"type": "results", ...} per indexer and a final {"type": "done", ...} summary.
+    Falls back to the aggregate endpoint as a single "all" indexer if indexers can't be listed.
+    """
+    url = str(JACKETT_API_URL)
+    started = time.perf_counter()
+    indexers = await list_indexers(url, JACKETT_API_KEY)
+    targets = [(indexer, _indexer_url(url, indexer["id"])) for indexer in indexers]
+    if not targets:
+        targets = [({"id": "all", "name": "All indexers"}, url)]
+
+    async def run(indexer, indexer_url):
+        results = await async_search_audiobook(query, indexer_url, use_cache=use_cache)
+        return indexer, results, (time.perf_counter() - started) * 1000
+
+    total = 0
+    for completed in asyncio.as_completed([run(indexer, indexer_url) for indexer, indexer_url in targets]):
+        indexer, results, elapsed_ms = await completed
+        total += len(results)
+        yield {
+            "type": "results",
+            "indexer": indexer["id"],
+            "name": indexer["name"],
+            "elapsed_ms": round(elapsed_ms),
+            "results": results,
+        }
+    yield {
+        "type": "done",
+        "indexers": len(targets),
+        "total": total,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000),
+    }
+
+def is_search_cached(query, api_url: Optional[str] = None, api_key: Optional[str] = None) -> bool:
+    url = api_url or JACKETT_API_URL
+    key = api_key or JACKETT_API_KEY
+    return search_cache.contains(search_cache.key(query, str(url), key or ""))
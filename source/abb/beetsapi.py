@@ -5,7 +5,7 @@ from beets.library import Library
 from beets import config, plugins
 from beets.autotag import Recommendation
 
-from .torrent_service import add_label_to_torrent, get_torrents, remove_label_from_torrent
+from .torrent_service import add_label_to_torrent, get_files_for_torrents, get_torrents, remove_label_from_torrent
 from .constants import ADMIN_USER_DICT, BEETS_COMPLETE_LABEL, BEETS_DIR, BEETS_ERROR_LABEL, BEETS_INPUT_PATH
 from .db import get_candidates, get_selected, save_candidates
 from .utils import custom_logger
@@ -145,9 +145,10 @@ class ProgrammaticImportSession(importer.ImportSession):
     def should_resume(self, path):
         return
 
-def getFolders(torrent):
+def getFolders(torrent, files=None):
     folders = set()
-    files = torrent.get("files", [])
+    if files is None:
+        files = get_files_for_torrents([str(torrent["id"])]).get(str(torrent["id"]), [])
     if not files:
         logger.warning(f"No files found for torrent {torrent.get('name')} - skipping")
         return []
@@ -170,12 +171,14 @@ def autoimport():
         logger.warn("No torrents found")
         return
     logger.info(f"Found {len(torrents)} torrents")
+    seeding_ids = [str(torrent["id"]) for torrent in torrents if torrent["status"] == "Seeding"]
+    files_by_id = get_files_for_torrents(seeding_ids)
     for torrent in torrents:
         try:
             if torrent["status"] != "Seeding":
                 continue
             logger.info(f"Processing {torrent['name']}")
-            folders = getFolders(torrent)
+            folders = getFolders(torrent, files_by_id.get(str(torrent["id"])))
             if not folders:
                 logger.warning(f"Skipping {torrent['name']} - no folders to process")
                 continue
@@ -74,6 +74,9 @@ def get_config_with_env_fallback(key: str, env_var: str, default: Any = None, ty
 CONFIG_SCHEMA = {
     "jackett_api_url": {"env": "JACKETT_API_URL", "default": "", "type": str, "label": "Jackett API URL", "group": "jackett", "sensitive": False},
     "jackett_api_key": {"env": "JACKETT_API_KEY", "default": "", "type": str, "label": "Jackett API Key", "group": "jackett", "sensitive": True},
+    "jackett_connect_timeout": {"env": "JACKETT_CONNECT_TIMEOUT", "default": 5, "type": int, "label": "Jackett Connect Timeout (seconds)", "group": "jackett", "sensitive": False},
+    "jackett_read_timeout": {"env": "JACKETT_READ_TIMEOUT", "default": 30, "type": int, "label": "Jackett Read Timeout (seconds)", "group": "jackett", "sensitive": False},
+    "search_cache_ttl": {"env": "SEARCH_CACHE_TTL", "default": 600, "type": int, "label": "Search Cache TTL (seconds, 0 disables)", "group": "jackett", "sensitive": False},
     
     "torrent_client_type": {"env": "TORRENT_CLIENT_TYPE", "default": "transmission", "type": str, "label": "Torrent Client Type", "group": "torrent", "sensitive": False, "options": ["transmission", "qbittorrent", "decypharr"]},
     
@@ -90,6 +93,9 @@ CONFIG_SCHEMA = {
     "decypharr_api_key": {"env": "DECYPHARR_API_KEY", "default": "", "type": str, "label": "Decypharr API Key", "group": "decypharr", "sensitive": True},
     
     "label": {"env": "LABEL", "default": "audiobook", "type": str, "label": "Torrent Label", "group": "torrent", "sensitive": False},
+    "torrent_refresh_interval": {"env": "TORRENT_REFRESH_INTERVAL", "default": 5, "type": int, "label": "Torrent Refresh Interval (seconds)", "group": "torrent", "sensitive": False},
+    "torrent_connect_timeout": {"env": "TORRENT_CONNECT_TIMEOUT", "default": 5, "type": int, "label": "Torrent Client Connect Timeout (seconds)", "group": "torrent", "sensitive": False},
+    "torrent_read_timeout": {"env": "TORRENT_READ_TIMEOUT", "default": 15, "type": int, "label": "Torrent Client Read Timeout (seconds)", "group": "torrent", "sensitive": False},
     "delete_after_days": {"env": "DELETE_AFTER_DAYS", "default": 14, "type": int, "label": "Delete After Days", "group": "cleanup", "sensitive": False},
     "strictly_delete_after_days": {"env": "STRICTLY_DELETE_AFTER_DAYS", "default": 30, "type": int, "label": "Force Delete After Days", "group": "cleanup", "sensitive": False},
     "pause_stale_after_days": {"env": "PAUSE_STALE_AFTER_DAYS", "default": 30, "type": int, "label": "Pause Stale After Days", "group": "cleanup", "sensitive": False},
@@ -98,6 +104,8 @@ CONFIG_SCHEMA = {
     "beets_input_path": {"env": "BEETS_INPUT_PATH", "default": "/beetsinput", "type": str, "label": "Beets Input Path", "group": "beets", "sensitive": False},
     
     "goodreads_enabled": {"env": "GOODREADS_ENABLED", "default": False, "type": bool, "label": "Enable Goodreads", "group": "goodreads", "sensitive": False},
+    "goodreads_connect_timeout": {"env": "GOODREADS_CONNECT_TIMEOUT", "default": 5, "type": int, "label": "Goodreads Connect Timeout (seconds)", "group": "goodreads", "sensitive": False},
+    "goodreads_read_timeout": {"env": "GOODREADS_READ_TIMEOUT", "default": 20, "type": int, "label": "Goodreads Read Timeout (seconds)", "group": "goodreads", "sensitive": False},
     
     "title": {"env": "TITLE", "default": "Audiobook Search", "type": str, "label": "App Title", "group": "app", "sensitive": False},
 }
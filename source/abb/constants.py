@@ -7,11 +7,33 @@ DB_PATH = os.getenv("DB_PATH", "/tmp")
 
 JACKETT_API_URL = get_effective_config("jackett_api_url")
 JACKETT_API_KEY = get_effective_config("jackett_api_key")
+SEARCH_CACHE_TTL = get_effective_config("search_cache_ttl")
+SEARCH_CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_MB", "32")) * 1024 * 1024
+# How long a caller waits on an identical in-flight request before making its own
+SINGLE_FLIGHT_WAIT = int(os.getenv("SINGLE_FLIGHT_WAIT", "30"))
+MAGNET_PREFETCH_COUNT = int(os.getenv("MAGNET_PREFETCH_COUNT", "10"))
+MAGNET_PREFETCH_WORKERS = int(os.getenv("MAGNET_PREFETCH_WORKERS", "4"))
+MAGNET_CACHE_MAX = int(os.getenv("MAGNET_CACHE_MAX", "5000"))
+# Indexed results older than this are marked stale in suggestions
+SUGGEST_FRESH_SECONDS = int(os.getenv("SUGGEST_FRESH_SECONDS", "86400"))
+# Shorter typeahead input only reads the local index and doesn't warm Jackett
+SUGGEST_WARM_MIN_CHARS = int(os.getenv("SUGGEST_WARM_MIN_CHARS", "4"))
+# Background Jackett searches /suggest may have running at once
+SUGGEST_MAX_WARMUPS = int(os.getenv("SUGGEST_MAX_WARMUPS", "2"))
+SUGGEST_INDEX_MAX_ROWS = int(os.getenv("SUGGEST_INDEX_MAX_ROWS", "50000"))
 
 TORRENT_CLIENT_TYPE = get_effective_config("torrent_client_type")
 TRANSMISSION_URL = get_effective_config("transmission_url")
 TRANSMISSION_USER = get_effective_config("transmission_user")
 TRANSMISSION_PASS = get_effective_config("transmission_pass")
+TRANSMISSION_POOL_SIZE = int(os.getenv("TRANSMISSION_POOL_SIZE", "10"))
+TRANSMISSION_FULL_SYNC_INTERVAL = int(os.getenv("TRANSMISSION_FULL_SYNC_INTERVAL", "300"))
+FILE_FETCH_CONCURRENCY = int(os.getenv("FILE_FETCH_CONCURRENCY", "8"))
+TORRENT_CLIENT_WORKERS = int(os.getenv("TORRENT_CLIENT_WORKERS", "8"))
+UPSTREAM_RETRIES = int(os.getenv("UPSTREAM_RETRIES", "2"))
+UPSTREAM_BACKOFF = float(os.getenv("UPSTREAM_BACKOFF", "0.5"))
+UPSTREAM_BREAKER_THRESHOLD = int(os.getenv("UPSTREAM_BREAKER_THRESHOLD", "5"))
+UPSTREAM_BREAKER_RESET = int(os.getenv("UPSTREAM_BREAKER_RESET", "30"))
 DECYPHARR_URL = get_effective_config("decypharr_url")
 DECYPHARR_API_KEY = get_effective_config("decypharr_api_key")
 QBITTORRENT_URL = get_effective_config("qbittorrent_url")
@@ -20,6 +42,7 @@ QBITTORRENT_PASSWORD = get_effective_config("qbittorrent_password")
 QBITTORRENT_CATEGORY = get_effective_config("qbittorrent_category")
 
 LABEL = get_effective_config("label")
+TORRENT_REFRESH_INTERVAL = get_effective_config("torrent_refresh_interval")
 
 # Internal admin user for background operations (beets, auto-delete)
 ADMIN_USER_DICT = User(username="admin", role="admin", id="admin")
@@ -39,3 +62,24 @@ TITLE = get_effective_config("title")
 AUTH_MODE = os.getenv("AUTH_MODE", "none")
 
 GOODREADS_ENABLED = get_effective_config("goodreads_enabled")
+GOODREADS_RETRY_HOURS = int(os.getenv("GOODREADS_RETRY_HOURS", "24"))
+# Processed books are written in batches of this size during a poll (0 = once at the end)
+GOODREADS_WRITE_BATCH = int(os.getenv("GOODREADS_WRITE_BATCH", "50"))
+GOODREADS_POLL_WORKERS = int(os.getenv("GOODREADS_POLL_WORKERS", "4"))
+GOODREADS_POLL_JITTER = int(os.getenv("GOODREADS_POLL_JITTER", "120"))
+# Goodreads books are searched under several query variants at once, within this budget
+MATCH_BUDGET_SECONDS = int(os.getenv("MATCH_BUDGET_SECONDS", "45"))
+MATCH_SEARCH_WORKERS = int(os.getenv("MATCH_SEARCH_WORKERS", "8"))
+# Books searched at once during a poll, and Jackett searches per second allowed for matching
+GOODREADS_SEARCH_CONCURRENCY = int(os.getenv("GOODREADS_SEARCH_CONCURRENCY", "4"))
+GOODREADS_PIPELINE_QUEUE = int(os.getenv("GOODREADS_PIPELINE_QUEUE", "8"))
+JACKETT_RATE_LIMIT = float(os.getenv("JACKETT_RATE_LIMIT", "2"))
+# Best matches scoring below this are recorded for review instead of being added
+MATCH_MIN_CONFIDENCE = float(os.getenv("MATCH_MIN_CONFIDENCE", "0.6"))
+MATCH_EXCLUDED_KEYWORDS = [
+    word.strip() for word in os.getenv(
+        "MATCH_EXCLUDED_KEYWORDS",
+        "abridged,dramatized,dramatised,dramatization,dramatisation,ebook,epub,pdf,mobi,azw3,sample,excerpt,summary,"
+        "german,deutsch,french,spanish,italian,russian"
+    ).split(",") if word.strip()
+]
@@ -1,12 +1,23 @@
 import feedparser
-from typing import List, Dict, Any, Optional
-from .audiobookbay import search_audiobook
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Optional, Tuple
+from .constants import (
+    GOODREADS_RETRY_HOURS, GOODREADS_WRITE_BATCH, GOODREADS_SEARCH_CONCURRENCY, GOODREADS_PIPELINE_QUEUE,
+    MATCH_EXCLUDED_KEYWORDS, MATCH_MIN_CONFIDENCE
+)
+from .matching import search_variants
+from .pipeline import staged_map
+from .scoring import best_match
 from .torrent_service import add_torrent
 from .models import User
+from .upstream import get_session
 from .goodreads_db import (
     get_config, update_poll_status,
-    get_processed_book, add_processed_book,
-    get_enabled_configs
+    get_all_processed_books, processed_book_record, save_processed_books,
+    get_shelf_sync, save_shelf_sync
 )
 from .utils import custom_logger
 
@@ -19,20 +30,78 @@ def build_rss_url(user_id: str, shelf: str, page: int = 1) -> str:
     return GOODREADS_RSS_URL.format(user_id=user_id, shelf=shelf, page=page)
 
 
-def fetch_goodreads_shelf(goodreads_user_id: str, shelf: str, max_pages: int = 10) -> List[Dict[str, Any]]:
+def _parse_date_added(value: str) -> Optional[datetime]:
+    """user_date_added is RFC 2822 ("Mon, 01 Jan 2024 12:00:00 -0800"); returned as naive UTC"""
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed is None:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _book_from_entry(entry) -> Dict[str, Any]:
+    return {
+        "book_id": entry.get("book_id", ""),
+        "title": entry.get("title", ""),
+        "author": entry.get("author_name", ""),
+        "isbn": entry.get("isbn", ""),
+        "image_url": entry.get("book_image_url", ""),
+        "date_added": entry.get("user_date_added", ""),
+    }
+
+
+def fetch_goodreads_shelf(
+    goodreads_user_id: str,
+    shelf: str,
+    max_pages: int = 10,
+    sync_state: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     """
-    Fetch all books from a Goodreads shelf with pagination.
-    Returns books sorted by date_added descending (latest first).
+    Fetch books from a Goodreads shelf, newest first (the feed is sorted by date_added descending).
+
+    With a sync_state from a previous fetch, the first page is requested conditionally and
+    pagination stops at the first book older than the stored cursor, so only books added
+    since then are returned. Returns the books and the sync state to store for next time.
     """
+    sync_state = sync_state or {}
+    cursor = None
+    if sync_state.get("cursor"):
+        cursor = datetime.fromisoformat(sync_state["cursor"])
+    new_state = dict(sync_state)
+    newest = cursor
+
     all_books = []
     page = 1
+    # Only a fetch that got through to the end may move the cursor, or unfetched books would be skipped forever
+    complete = False
     
     while page <= max_pages:
         url = build_rss_url(goodreads_user_id, shelf, page)
         logger.info(f"Fetching Goodreads RSS page {page}: {url}")
         
+        headers = {}
+        if page == 1 and cursor is not None:
+            if sync_state.get("etag"):
+                headers["If-None-Match"] = sync_state["etag"]
+            if sync_state.get("last_modified"):
+                headers["If-Modified-Since"] = sync_state["last_modified"]
+
         try:
-            feed = feedparser.parse(url)
+            response = get_session("goodreads").get(url, headers=headers)
+            if response.status_code == 304:
+                logger.info(f"Shelf '{shelf}' unchanged since last poll")
+                return [], sync_state
+            if response.status_code != 200:
+                logger.error(f"Goodreads RSS returned {response.status_code} on page {page}")
+                break
+            if page == 1:
+                new_state["etag"] = response.headers.get("ETag")
+                new_state["last_modified"] = response.headers.get("Last-Modified")
+            feed = feedparser.parse(response.content)
             
             if feed.bozo:
                 logger.error(f"RSS parse error on page {page}: {feed.bozo_exception}")
@@ -40,22 +109,29 @@ def fetch_goodreads_shelf(goodreads_user_id: str, shelf: str, max_pages: int = 1
             
             if not feed.entries:
                 logger.info(f"No more entries on page {page}, stopping pagination")
+                complete = True
                 break
             
+            reached_cursor = False
             for entry in feed.entries:
-                book = {
-                    "book_id": entry.get("book_id", ""),
-                    "title": entry.get("title", ""),
-                    "author": entry.get("author_name", ""),
-                    "isbn": entry.get("isbn", ""),
-                    "image_url": entry.get("book_image_url", ""),
-                    "date_added": entry.get("user_date_added", ""),
-                }
+                book = _book_from_entry(entry)
+                added = _parse_date_added(book["date_added"])
+                if cursor is not None and added is not None and added < cursor:
+                    reached_cursor = True
+                    break
+                if added is not None and (newest is None or added > newest):
+                    newest = added
                 all_books.append(book)
             
             logger.info(f"Page {page}: fetched {len(feed.entries)} books (total: {len(all_books)})")
             
-            if len(feed.entries) < 200:
+            if reached_cursor:
+                logger.info(f"Reached books already seen on page {page}, stopping pagination")
+                complete = True
+                break
+
+            if len(feed.entries) < 200 or page == max_pages:
+                complete = True
                 break
             
             page += 1
@@ -65,41 +141,87 @@ def fetch_goodreads_shelf(goodreads_user_id: str, shelf: str, max_pages: int = 1
             break
     
     logger.info(f"Total books fetched from shelf '{shelf}': {len(all_books)}")
-    return all_books
+    if not complete:
+        return all_books, sync_state
+    if newest is not None:
+        new_state["cursor"] = newest.isoformat()
+    return all_books, new_state
+
+
+def _should_retry(processed: Dict[str, Any]) -> bool:
+    """Books that found nothing (or nothing confident) are searched again once GOODREADS_RETRY_HOURS have passed"""
+    if processed.get("status") not in ("no_results", "needs_review"):
+        return False
+    try:
+        last_attempt = datetime.fromisoformat(processed.get("added_date", ""))
+    except ValueError:
+        return True
+    return datetime.utcnow() - last_attempt >= timedelta(hours=GOODREADS_RETRY_HOURS)
+
+
+def download_best_match(book: Dict[str, Any], user: User) -> Dict[str, Any]:
+    return add_best_match(book, search_variants(book), user)
 
 
-def download_best_match(title: str, user: User) -> Optional[Dict[str, Any]]:
-    results = search_audiobook(title)
+def add_best_match(book: Dict[str, Any], results: List[Dict[str, Any]], user: User) -> Dict[str, Any]:
+    """Add the most confident result for a book.
+
+    Returns the outcome with a status of "downloaded", "needs_review" (best result below
+    MATCH_MIN_CONFIDENCE, nothing added) or "no_results".
+    """
+    title = book.get("title", "")
     
-    if not results:
+    match, confidence = best_match(book, results, MATCH_EXCLUDED_KEYWORDS)
+    if not match:
         logger.info(f"No results found for: {title}")
-        return None
+        return {"status": "no_results"}
+    
+    outcome = {"title": match.get("Title"), "size": match.get("Size"), "confidence": confidence}
+    if confidence < MATCH_MIN_CONFIDENCE:
+        logger.info(f"Best match for '{title}' needs review ({confidence:.2f}): {match.get('Title')}")
+        return {**outcome, "status": "needs_review"}
     
-    best_match = results[0]
-    torrent_url = best_match.get("MagnetUri") or best_match.get("Link")
+    torrent_url = match.get("MagnetUri") or match.get("Link")
     
     if not torrent_url:
         logger.error(f"No torrent URL found for: {title}")
-        return None
+        return {**outcome, "status": "no_results"}
     
-    logger.info(f"Downloading best match for '{title}': {best_match.get('Title')}")
+    logger.info(f"Downloading best match for '{title}' ({confidence:.2f}): {match.get('Title')}")
     
     try:
         success = add_torrent(torrent_url, user)
         if success:
-            return {
-                "title": best_match.get("Title"),
-                "size": best_match.get("Size"),
-                "url": torrent_url
-            }
+            return {**outcome, "status": "downloaded", "url": torrent_url}
     except Exception as e:
         logger.error(f"Failed to add torrent for '{title}': {e}")
     
-    return None
+    return {**outcome, "status": "no_results"}
+
+
+_poll_locks: Dict[str, threading.Lock] = {}
+_poll_locks_guard = threading.Lock()
+
+
+def _poll_lock(user_id: str) -> threading.Lock:
+    with _poll_locks_guard:
+        return _poll_locks.setdefault(user_id, threading.Lock())
 
 
 def poll_and_download_for_user(user_id: str, config: Dict[str, Any]) -> Dict[str, Any]:
     """Poll and download books for a specific user based on their config."""
+    # A manual poll and a scheduled one for the same user must not overlap
+    lock = _poll_lock(user_id)
+    if not lock.acquire(blocking=False):
+        logger.info(f"Goodreads poll already running for user {user_id}, skipping")
+        return {"status": "busy", "message": "A poll is already running for this user", "user_id": user_id}
+    try:
+        return _poll_user(user_id, config)
+    finally:
+        lock.release()
+
+
+def _poll_user(user_id: str, config: Dict[str, Any]) -> Dict[str, Any]:
     goodreads_user_id = config.get("goodreads_user_id")
     shelf = config.get("shelf", "to-read")
     
@@ -109,56 +231,93 @@ def poll_and_download_for_user(user_id: str, config: Dict[str, Any]) -> Dict[str
         return {"status": "error", "message": "Goodreads User ID not configured", "user_id": user_id}
     
     logger.info(f"Starting Goodreads poll for user {user_id}, goodreads_user_id {goodreads_user_id}, shelf '{shelf}'")
+    pending: List[Dict[str, Any]] = []
     
     try:
-        books = fetch_goodreads_shelf(goodreads_user_id, shelf)
+        sync_state = get_shelf_sync(user_id, goodreads_user_id, shelf)
+        books, new_sync_state = fetch_goodreads_shelf(goodreads_user_id, shelf, sync_state=sync_state)
+
+        # One scan of the processed books per poll instead of a TinyDB lookup per book
+        processed = {record.get("book_id"): record for record in get_all_processed_books(user_id)}
+        # Only newly shelved books come back from an incremental fetch, so books that
+        # found nothing last time are picked up from their processed records instead
+        shelf_ids = {book.get("book_id") for book in books}
+        books += [
+            {"book_id": record["book_id"], "title": record.get("title", ""), "author": record.get("author", "")}
+            for book_id, record in processed.items()
+            if book_id not in shelf_ids and _should_retry(record)
+        ]
         
         if not books:
-            update_poll_status(user_id, "success", "No books found on shelf")
-            return {"status": "success", "message": "No books on shelf", "processed": 0, "user_id": user_id}
+            save_shelf_sync(user_id, goodreads_user_id, shelf, new_sync_state)
+            update_poll_status(user_id, "success", "No new books on shelf")
+            return {"status": "success", "message": "No new books on shelf", "processed": 0, "user_id": user_id}
         
         torrent_user = User(username=f"goodreads-{user_id}", role="admin", id=user_id)
         
         new_downloads = 0
         skipped = 0
         no_results = 0
+        needs_review = 0
         
+        to_search = []
+        queued = set()
         for book in books:
             book_id = book.get("book_id")
-            title = book.get("title")
-            author = book.get("author", "")
-            
-            if not book_id or not title:
+            if not book_id or not book.get("title") or book_id in queued:
                 continue
             
-            existing = get_processed_book(user_id, book_id)
-            if existing:
+            existing = processed.get(book_id)
+            if existing and not _should_retry(existing):
                 skipped += 1
                 continue
+            queued.add(book_id)
+            to_search.append(book)
+        
+        # Searches run concurrently (rate limited towards Jackett) while this thread adds
+        # the matches one at a time; bounded queues keep the stages in step
+        searched = staged_map(
+            to_search, search_variants, GOODREADS_SEARCH_CONCURRENCY, GOODREADS_PIPELINE_QUEUE,
+            name="goodreads-search"
+        )
+        for book, results, error in searched:
+            book_id = book.get("book_id")
+            title = book.get("title")
+            author = book.get("author", "")
             
-            result = download_best_match(title, torrent_user)
+            result = add_best_match(book, results or [], torrent_user)
+            status = result["status"]
             
-            if result:
-                add_processed_book(
-                    user_id=user_id,
-                    book_id=book_id,
-                    title=title,
-                    author=author,
-                    status="downloaded",
-                    torrent_name=result.get("title", "")
-                )
+            record = processed_book_record(
+                user_id=user_id,
+                book_id=book_id,
+                title=title,
+                author=author,
+                status=status,
+                torrent_name=result.get("title") or "",
+                confidence=result.get("confidence")
+            )
+            if status == "downloaded":
                 new_downloads += 1
+            elif status == "needs_review":
+                needs_review += 1
             else:
-                add_processed_book(
-                    user_id=user_id,
-                    book_id=book_id,
-                    title=title,
-                    author=author,
-                    status="no_results"
-                )
                 no_results += 1
+            processed[book_id] = record
+            pending.append(record)
+
+            # Torrents are already added, so flush now and then rather than risk losing a long poll's records
+            if GOODREADS_WRITE_BATCH and len(pending) >= GOODREADS_WRITE_BATCH:
+                save_processed_books(user_id, pending)
+                pending = []
         
-        message = f"Downloaded: {new_downloads}, No results: {no_results}, Skipped: {skipped}"
+        save_processed_books(user_id, pending)
+        # Advance the cursor only once every fetched book has been handled
+        save_shelf_sync(user_id, goodreads_user_id, shelf, new_sync_state)
+        message = (
+            f"Downloaded: {new_downloads}, Needs review: {needs_review}, "
+            f"No results: {no_results}, Skipped: {skipped}"
+        )
         update_poll_status(user_id, "success", message)
         logger.info(f"Poll complete for user {user_id}: {message}")
         
@@ -167,6 +326,7 @@ def poll_and_download_for_user(user_id: str, config: Dict[str, Any]) -> Dict[str
             "message": message,
             "user_id": user_id,
             "new_downloads": new_downloads,
+            "needs_review": needs_review,
             "no_results": no_results,
             "skipped": skipped
         }
@@ -174,45 +334,15 @@ def poll_and_download_for_user(user_id: str, config: Dict[str, Any]) -> Dict[str
     except Exception as e:
         error_msg = f"Poll failed: {str(e)}"
         logger.error(f"Poll failed for user {user_id}: {error_msg}")
+        # Keep the records of torrents that were already added before the failure
+        try:
+            save_processed_books(user_id, pending)
+        except Exception as save_error:
+            logger.error(f"Failed to save processed books for user {user_id}: {save_error}")
         update_poll_status(user_id, "error", error_msg)
         return {"status": "error", "message": error_msg, "user_id": user_id}
 
 
-def poll_and_download() -> Dict[str, Any]:
-    """Poll and download books for all enabled users."""
-    enabled_configs = get_enabled_configs()
-    
-    if not enabled_configs:
-        logger.info("No enabled Goodreads configurations found")
-        return {"status": "disabled", "message": "No enabled configurations", "results": []}
-    
-    results = []
-    total_downloads = 0
-    total_errors = 0
-    
-    for config in enabled_configs:
-        user_id = config.get("user_id")
-        if not user_id:
-            continue
-            
-        result = poll_and_download_for_user(user_id, config)
-        results.append(result)
-        
-        if result.get("status") == "success":
-            total_downloads += result.get("new_downloads", 0)
-        else:
-            total_errors += 1
-    
-    return {
-        "status": "success",
-        "message": f"Polled {len(results)} users, {total_downloads} new downloads, {total_errors} errors",
-        "results": results,
-        "total_users": len(results),
-        "total_downloads": total_downloads,
-        "total_errors": total_errors
-    }
-
-
 def poll_and_download_single_user(user_id: str) -> Dict[str, Any]:
     """Poll and download books for a single specific user."""
     config = get_config(user_id)
@@ -228,12 +358,14 @@ def validate_goodreads_config(goodreads_user_id: str, shelf: str) -> Dict[str, A
     if not goodreads_user_id:
         return {"valid": False, "message": "Goodreads User ID is required"}
     
-    books = fetch_goodreads_shelf(goodreads_user_id, shelf)
+    # The first page is enough to prove the shelf exists and is readable
+    books, _ = fetch_goodreads_shelf(goodreads_user_id, shelf, max_pages=1)
     
     if books:
+        count = f"{len(books)}+" if len(books) >= 200 else str(len(books))
         return {
             "valid": True,
-            "message": f"Found {len(books)} books on shelf '{shelf}'",
+            "message": f"Found {count} books on shelf '{shelf}'",
             "book_count": len(books)
         }
     else:
@@ -241,3 +373,12 @@ def validate_goodreads_config(goodreads_user_id: str, shelf: str) -> Dict[str, A
             "valid": False,
             "message": f"Could not fetch books. Check Goodreads user ID ({goodreads_user_id}) and shelf name ({shelf})"
         }
+
+
+def run_scheduled_poll(user_id: str) -> Dict[str, Any]:
+    """Scheduler entry point: poll one user and log how long it took."""
+    started = time.perf_counter()
+    result = poll_and_download_single_user(user_id)
+    elapsed = time.perf_counter() - started
+    logger.info(f"Scheduled Goodreads poll for user {user_id} finished in {elapsed:.1f}s ({result.get('status')}): {result.get('message')}")
+    return result
@@ -1,4 +1,6 @@
+import functools
 import os
+import threading
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from .constants import DB_PATH
@@ -6,15 +8,30 @@ from tinydb import TinyDB, Query
 
 # Database for Goodreads configuration and processed books
 goodreadsdb = TinyDB(os.path.join(DB_PATH, "goodreads.json"))
+# TinyDB isn't thread-safe and every write rewrites the whole file, so concurrent polls
+# (and API requests) must not interleave their reads and writes. Reentrant because
+# some helpers call others.
+_db_lock = threading.RLock()
+
+
+def _locked(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _db_lock:
+            return func(*args, **kwargs)
+    return wrapper
 
 # Config table stores: user_id, goodreads_user_id, shelf, poll_interval, enabled, last_poll
-# Processed table stores: user_id, book_id, title, author, added_date, downloaded_date, torrent_id, status
+# Processed table stores: user_id, book_id, title, author, added_date, downloaded_date, torrent_id, status, confidence
+# Shelf sync table stores: user_id, goodreads_user_id, shelf, etag, last_modified, cursor (newest date_added seen)
 
 CONFIG_DOC_TYPE = "config"
 PROCESSED_DOC_TYPE = "processed_book"
 MIGRATION_DOC_TYPE = "migration_status"
+SHELF_SYNC_DOC_TYPE = "shelf_sync"
 
 
+@_locked
 def migrate_legacy_data_for_user(user_id: str, is_admin: bool) -> None:
     if not is_admin:
         return
@@ -59,6 +76,7 @@ def migrate_legacy_data_for_user(user_id: str, is_admin: bool) -> None:
         goodreadsdb.insert({"doc_type": MIGRATION_DOC_TYPE, "completed": True})
 
 
+@_locked
 def get_config(user_id: str) -> Dict[str, Any]:
     """Get Goodreads configuration for a specific user."""
     q = Query()
@@ -86,6 +104,7 @@ def get_config(user_id: str) -> Dict[str, Any]:
     }
 
 
+@_locked
 def get_all_configs() -> List[Dict[str, Any]]:
     """Get all Goodreads configurations for all users."""
     q = Query()
@@ -105,6 +124,7 @@ def get_all_configs() -> List[Dict[str, Any]]:
     ]
 
 
+@_locked
 def get_enabled_configs() -> List[Dict[str, Any]]:
     """Get all enabled Goodreads configurations."""
     q = Query()
@@ -124,6 +144,7 @@ def get_enabled_configs() -> List[Dict[str, Any]]:
     ]
 
 
+@_locked
 def save_config(
     user_id: str,
     goodreads_user_id: str,
@@ -154,6 +175,7 @@ def save_config(
     return get_config(user_id)
 
 
+@_locked
 def update_poll_status(user_id: str, status: str, message: str = "") -> None:
     """Update the last poll status for a specific user."""
     q = Query()
@@ -167,40 +189,75 @@ def update_poll_status(user_id: str, status: str, message: str = "") -> None:
     )
 
 
+@_locked
 def get_processed_book(user_id: str, book_id: str) -> Optional[Dict[str, Any]]:
     """Get a processed book by its Goodreads book ID for a specific user."""
     q = Query()
     return goodreadsdb.get((q.user_id == user_id) & (q.book_id == book_id) & (q.doc_type == PROCESSED_DOC_TYPE))
 
 
+@_locked
 def get_all_processed_books(user_id: str) -> List[Dict[str, Any]]:
     """Get all processed books for a specific user."""
     q = Query()
     return goodreadsdb.search((q.doc_type == PROCESSED_DOC_TYPE) & (q.user_id == user_id))
 
 
-def add_processed_book(
+def processed_book_record(
     user_id: str,
     book_id: str,
     title: str,
     author: str,
     status: str = "downloaded",
     torrent_name: str = "",
-    error_message: str = ""
+    error_message: str = "",
+    confidence: Optional[float] = None
 ) -> Dict[str, Any]:
-    """Add a book to the processed list for a specific user."""
-    q = Query()
-    book_data = {
+    """Build a processed book document without writing it."""
+    return {
         "doc_type": PROCESSED_DOC_TYPE,
         "user_id": user_id,
         "book_id": book_id,
         "title": title,
         "author": author,
         "added_date": datetime.utcnow().isoformat(),
-        "status": status,  # "downloaded", "no_results", "error"
+        "status": status,  # "downloaded", "needs_review", "no_results", "error"
         "torrent_name": torrent_name,
         "error_message": error_message,
+        "confidence": round(confidence, 3) if confidence is not None else None,
     }
+
+
+@_locked
+def save_processed_books(user_id: str, records: List[Dict[str, Any]]) -> None:
+    """Write a batch of processed book documents, replacing earlier records of the same books.
+
+    TinyDB rewrites the whole file on every change, so this costs one write for the
+    inserts (plus one for the removal when books were retried) instead of one per book.
+    """
+    if not records:
+        return
+    q = Query()
+    book_ids = [record["book_id"] for record in records]
+    replaced = (q.doc_type == PROCESSED_DOC_TYPE) & (q.user_id == user_id) & (q.book_id.one_of(book_ids))
+    if goodreadsdb.contains(replaced):
+        goodreadsdb.remove(replaced)
+    goodreadsdb.insert_multiple(records)
+
+
+@_locked
+def add_processed_book(
+    user_id: str,
+    book_id: str,
+    title: str,
+    author: str,
+    status: str = "downloaded",
+    torrent_name: str = "",
+    error_message: str = ""
+) -> Dict[str, Any]:
+    """Add a book to the processed list for a specific user."""
+    q = Query()
+    book_data = processed_book_record(user_id, book_id, title, author, status, torrent_name, error_message)
     
     existing = get_processed_book(user_id, book_id)
     if existing:
@@ -211,15 +268,63 @@ def add_processed_book(
     return book_data
 
 
+@_locked
 def delete_processed_book(user_id: str, book_id: str) -> bool:
     """Delete a processed book for a specific user (allows re-download)."""
     q = Query()
-    removed = goodreadsdb.remove((q.user_id == user_id) & (q.book_id == book_id))
+    removed = goodreadsdb.remove((q.user_id == user_id) & (q.book_id == book_id) & (q.doc_type == PROCESSED_DOC_TYPE))
+    if removed:
+        # The book is behind the sync cursor; a full fetch is needed to see it again
+        reset_shelf_sync(user_id)
     return len(removed) > 0
 
 
+@_locked
 def clear_all_processed_books(user_id: str) -> int:
     """Clear all processed books for a specific user (allows re-downloading everything)."""
     q = Query()
     removed = goodreadsdb.remove((q.doc_type == PROCESSED_DOC_TYPE) & (q.user_id == user_id))
+    reset_shelf_sync(user_id)
     return len(removed)
+
+
+@_locked
+def get_shelf_sync(user_id: str, goodreads_user_id: str, shelf: str) -> Dict[str, Any]:
+    """Validators and cursor from the last completed fetch of a shelf, or {} if never synced."""
+    q = Query()
+    entry = goodreadsdb.get(
+        (q.doc_type == SHELF_SYNC_DOC_TYPE) & (q.user_id == user_id) &
+        (q.goodreads_user_id == goodreads_user_id) & (q.shelf == shelf)
+    )
+    if not entry:
+        return {}
+    return {
+        "etag": entry.get("etag"),
+        "last_modified": entry.get("last_modified"),
+        "cursor": entry.get("cursor"),
+    }
+
+
+@_locked
+def save_shelf_sync(user_id: str, goodreads_user_id: str, shelf: str, state: Dict[str, Any]) -> None:
+    """Store the sync state of a user's shelf, replacing any state for other shelves."""
+    q = Query()
+    if state == get_shelf_sync(user_id, goodreads_user_id, shelf):
+        return
+    goodreadsdb.remove((q.doc_type == SHELF_SYNC_DOC_TYPE) & (q.user_id == user_id))
+    goodreadsdb.insert({
+        "doc_type": SHELF_SYNC_DOC_TYPE,
+        "user_id": user_id,
+        "goodreads_user_id": goodreads_user_id,
+        "shelf": shelf,
+        "etag": state.get("etag"),
+        "last_modified": state.get("last_modified"),
+        "cursor": state.get("cursor"),
+    })
+
+
+@_locked
+def reset_shelf_sync(user_id: str) -> None:
+    """Forget the sync state so the next poll fetches the whole shelf."""
+    q = Query()
+    goodreadsdb.remove((q.doc_type == SHELF_SYNC_DOC_TYPE) & (q.user_id == user_id))
@@ -0,0 +1,153 @@
+"""
+Resolution of Jackett download links to magnet URIs.
+
+Resolved links are kept in a small SQLite table so a link is only ever sent to
+Jackett once, and search results are resolved in the background while the user
+is still reading them, so adding a torrent doesn't wait on Jackett.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import parse_qs, urlparse
+
+from .audiobookbay import get_jackett_magnet
+from .constants import DB_PATH, MAGNET_CACHE_MAX, MAGNET_PREFETCH_WORKERS
+from .singleflight import SingleFlight
+from .utils import custom_logger
+
+logger = custom_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS magnets (
+    link TEXT PRIMARY KEY,
+    magnet TEXT NOT NULL,
+    info_hash TEXT,
+    resolved_at REAL NOT NULL
+);
+"""
+
+
+def info_hash_from_magnet(magnet: str) -> Optional[str]:
+    """The btih info-hash of a magnet URI, lowercased"""
+    for topic in parse_qs(urlparse(magnet).query).get("xt", []):
+        if topic.lower().startswith("urn:btih:"):
+            return topic[len("urn:btih:"):].lower()
+    return None
+
+
+class MagnetResolver:
+    """Link -> magnet resolver backed by an on-disk cache, with background prefetch"""
+
+    def __init__(self, db_path: str, max_entries: int, workers: int):
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            rows = self._conn.execute("SELECT * FROM magnets").fetchall()
+        # Lookups are served from memory; a row is only written when a link is first resolved
+        self._entries: Dict[str, Dict[str, Any]] = {row["link"]: dict(row) for row in rows}
+        self._flight = SingleFlight(wait_timeout=60)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="magnet-prefetch")
+        self._pending = set()
+
+    def cached(self, link: str) -> Optional[Dict[str, Any]]:
+        return self._entries.get(link)
+
+    def resolve(self, link: str) -> str:
+        """Magnet for link, from the cache or Jackett; falls back to link itself if it can't be resolved"""
+        if not link or link.startswith("magnet:"):
+            return link
+        entry = self._entries.get(link)
+        if entry is not None:
+            return entry["magnet"]
+        # A prefetch of the same link may already be talking to Jackett
+        return self._flight.do(link, self._resolve_and_store, link)
+
+    def _resolve_and_store(self, link: str) -> str:
+        magnet = get_jackett_magnet(link)
+        if magnet.startswith("magnet:"):
+            self._store(link, magnet)
+        return magnet
+
+    def _store(self, link: str, magnet: str) -> None:
+        entry = {
+            "link": link,
+            "magnet": magnet,
+            "info_hash": info_hash_from_magnet(magnet),
+            "resolved_at": time.time(),
+        }
+        with self._lock:
+            self._entries[link] = entry
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO magnets (link, magnet, info_hash, resolved_at) VALUES (?, ?, ?, ?)",
+                        (link, magnet, entry["info_hash"], entry["resolved_at"]),
+                    )
+                    if len(self._entries) > self.max_entries:
+                        self._prune()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to store magnet for {link}: {e}")
+
+    def _prune(self) -> None:
+        """Drop the oldest tenth of the cache"""
+        oldest = sorted(self._entries.values(), key=lambda entry: entry["resolved_at"])
+        dropped = [entry["link"] for entry in oldest[:max(1, len(oldest) // 10)]]
+        for link in dropped:
+            del self._entries[link]
+        self._conn.executemany("DELETE FROM magnets WHERE link = ?", [(link,) for link in dropped])
+
+    def prefetch(self, results: Iterable[Dict[str, Any]], count: int) -> None:
+        """Resolve the links of the first `count` results without a magnet in the background"""
+        scheduled = 0
+        for result in results:
+            if scheduled >= count:
+                break
+            link = result.get("Link")
+            if result.get("MagnetUri") or not link or link in self._entries:
+                continue
+            with self._lock:
+                if link in self._pending:
+                    continue
+                self._pending.add(link)
+            self._executor.submit(self._prefetch_one, link)
+            scheduled += 1
+
+    def _prefetch_one(self, link: str) -> None:
+        try:
+            self.resolve(link)
+        except Exception as e:
+            logger.debug(f"Magnet prefetch failed for {link}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(link)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_resolver: Optional[MagnetResolver] = None
+_resolver_lock = threading.Lock()
+
+
+def get_magnet_resolver() -> MagnetResolver:
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = MagnetResolver(
+                os.path.join(DB_PATH, "magnets.db"), MAGNET_CACHE_MAX, MAGNET_PREFETCH_WORKERS
+            )
+        return _resolver
+
+
+def shutdown_magnet_resolver() -> None:
+    """Drop queued prefetches on shutdown, if the resolver was ever used"""
+    if _resolver is not None:
+        _resolver.shutdown()
@@ -1,34 +1,47 @@
 
+import asyncio
 import os
+import orjson
 import uvicorn
 from contextlib import asynccontextmanager
 from datetime import datetime
 
 from fastapi import FastAPI, Query, HTTPException, Depends, status as httpstatus, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, RedirectResponse
+from fastapi.responses import FileResponse, ORJSONResponse, RedirectResponse, StreamingResponse
 from starlette.middleware.sessions import SessionMiddleware
+from apscheduler.executors.pool import ThreadPoolExecutor as SchedulerThreadPool
 from apscheduler.schedulers.background import BackgroundScheduler
 from pydantic import BaseModel
 
-from .models import TorrentRequest, User, TorrentClientType
+from typing import List
+from .models import TorrentRequest, User, TorrentClientType, BatchAction, BatchRequest, SearchResponse, TorrentRow
+from starlette.concurrency import run_in_threadpool
+from .torrent import TorrentClientUnavailable
 from .torrent_service import (
-    init_torrent_service, get_torrents, add_torrent, delete_torrent, 
-    pause_torrent, resume_torrent, remove_label_from_torrent_with_hash, delete_old_torrents,
-    pause_stale_torrents, set_category
+    init_torrent_service, get_torrent_service, get_async_torrent_service,
+    delete_old_torrents, pause_stale_torrents
 )
-from .audiobookbay import search_audiobook
+from .audiobookbay import async_search_audiobook, is_search_cached, search_cache, stream_search
+from .magnets import get_magnet_resolver, shutdown_magnet_resolver
+from .search_index import get_search_index
+from .results import Deduplicator, process_results, project, rank
+from .upstream import close_async_client, reset_backends
 from .beetsapi import autoimport
-from .constants import BEETS_ERROR_LABEL, TRANSMISSION_URL, TRANSMISSION_USER, TRANSMISSION_PASS, DECYPHARR_URL, DECYPHARR_API_KEY, QBITTORRENT_URL, QBITTORRENT_USERNAME, QBITTORRENT_PASSWORD, TORRENT_CLIENT_TYPE, SESSION_KEY, TITLE, AUTH_MODE, GOODREADS_ENABLED
+from .constants import MAGNET_PREFETCH_COUNT, SUGGEST_WARM_MIN_CHARS, SUGGEST_MAX_WARMUPS, GOODREADS_POLL_WORKERS, GOODREADS_POLL_JITTER, BEETS_ERROR_LABEL, TRANSMISSION_URL, TRANSMISSION_USER, TRANSMISSION_PASS, DECYPHARR_URL, DECYPHARR_API_KEY, QBITTORRENT_URL, QBITTORRENT_USERNAME, QBITTORRENT_PASSWORD, TORRENT_CLIENT_TYPE, SESSION_KEY, TITLE, AUTH_MODE, GOODREADS_ENABLED
 from .db import select_candidate
 from .utils import custom_logger
-from .goodreads import poll_and_download, poll_and_download_single_user, validate_goodreads_config
+from .goodreads import poll_and_download_single_user, run_scheduled_poll, validate_goodreads_config
 from .goodreads_db import get_config as get_goodreads_config, save_config as save_goodreads_config, get_all_processed_books, delete_processed_book, clear_all_processed_books, get_enabled_configs, migrate_legacy_data_for_user
 from .config_db import get_all_effective_configs, get_config_schema, set_config, get_effective_config, CONFIG_SCHEMA
 
 logger = custom_logger(__name__)
 
-scheduler = BackgroundScheduler()
+# Polls run on a bounded pool; a user's next poll is skipped while their previous one is still running
+scheduler = BackgroundScheduler(
+    executors={"default": SchedulerThreadPool(GOODREADS_POLL_WORKERS)},
+    job_defaults={"max_instances": 1, "coalesce": True, "misfire_grace_time": 300}
+)
 
 
 class GoodreadsConfigRequest(BaseModel):
@@ -43,27 +56,46 @@ class CategoryRequest(BaseModel):
 class AppConfigUpdate(BaseModel):
     configs: dict
 
+def goodreads_job_id(user_id: str) -> str:
+    return f"goodreads_poll_{user_id}"
+
+def schedule_goodreads_user(config: dict):
+    """Add, update or remove the polling job of one user from their Goodreads config."""
+    user_id = config.get("user_id")
+    if not user_id:
+        return
+    job_id = goodreads_job_id(user_id)
+
+    if not config.get("enabled") or not config.get("goodreads_user_id"):
+        if scheduler.get_job(job_id):
+            scheduler.remove_job(job_id)
+            logger.info(f"Removed Goodreads polling for user {user_id}")
+        return
+
+    poll_interval = max(1, int(config.get("poll_interval") or 60))
+    scheduler.add_job(
+        run_scheduled_poll,
+        'interval',
+        minutes=poll_interval,
+        # Spread users out so polls with the same interval don't all fire together
+        jitter=min(GOODREADS_POLL_JITTER, poll_interval * 60 // 2),
+        args=[user_id],
+        id=job_id,
+        replace_existing=True
+    )
+    if not scheduler.running:
+        scheduler.start()
+        logger.info("Started Goodreads scheduler")
+    logger.info(f"Goodreads polling for user {user_id} every {poll_interval} minutes")
+
 def setup_goodreads_scheduler():
-    """Setup or update the Goodreads polling scheduler based on current config."""
+    """Schedule one polling job per enabled Goodreads config."""
     enabled_configs = get_enabled_configs()
-    
-    scheduler.remove_all_jobs()
-    
+    for config in enabled_configs:
+        schedule_goodreads_user(config)
+
     if enabled_configs:
-        min_poll_interval = min(config.get("poll_interval", 60) for config in enabled_configs)
-        scheduler.add_job(
-            poll_and_download,
-            'interval',
-            minutes=min_poll_interval,
-            id='goodreads_poll',
-            replace_existing=True
-        )
-        
-        if not scheduler.running:
-            scheduler.start()
-            logger.info("Started Goodreads scheduler")
-        
-        logger.info(f"Goodreads scheduler configured with {min_poll_interval} minute interval for {len(enabled_configs)} users")
+        logger.info(f"Goodreads scheduler configured for {len(enabled_configs)} users")
     else:
         logger.info("Goodreads scheduler disabled (no enabled configurations)")
 
@@ -93,6 +125,7 @@ async def lifespan(app: FastAPI):
                 password=QBITTORRENT_PASSWORD
             )
 
+        get_torrent_service().start()
         logger.info(f"Initialized torrent service with {client_type.value} client")
     except ValueError as e:
         logger.error(f"Invalid torrent client type: {TORRENT_CLIENT_TYPE}")
@@ -106,6 +139,10 @@ async def lifespan(app: FastAPI):
         logger.info("Goodreads integration enabled")
     yield
     
+    get_torrent_service().stop()
+    get_async_torrent_service().shutdown()
+    shutdown_magnet_resolver()
+    await close_async_client()
     if scheduler.running:
         scheduler.shutdown()
     logger.info("Application shutdown")
@@ -124,7 +161,7 @@ def authenticate_authentik(request: Request):
     logger.info(f"Authenticating user: {username}, role: {role}, id: {id}")
     return User(username=username, role=role, id=username)
 
-def authenticate(request: Request):
+async def authenticate(request: Request):
     if AUTH_MODE == "none":
         return User(username="admin", role="admin", id="admin")
     elif AUTH_MODE == "authentik":
@@ -144,7 +181,7 @@ def authenticate_userpass_authentik(request: Request):
     logger.info(f"Authenticating user: {username}, role: {role}, id: {id}")
     return User(username=username, role=role, id=username)
 
-def validate_admin(request: Request):
+async def validate_admin(request: Request):
     if AUTH_MODE == "none":
         return User(username="admin", role="admin", id="admin")
     elif AUTH_MODE == "authentik":
@@ -230,25 +267,101 @@ def status():
     now = datetime.utcnow().isoformat() + "Z"
     return {"status": "ok", "timestamp": now}
 
-@app.get("/search")
-def search(
+# The hot listing endpoints return ORJSONResponse directly: FastAPI then skips
+# jsonable_encoder and response validation, and the models only document the shape
+@app.get("/search", response_model=SearchResponse)
+async def search(
     query: str = Query(..., description="Search query"),
+    refresh: bool = Query(False, description="Bypass the search cache (admins only)"),
+    limit: int = Query(100, ge=1, le=500, description="Maximum results to return"),
+    offset: int = Query(0, ge=0, description="Results to skip, for paging"),
     user: User = Depends(authenticate)
 ):
     try:
-        results = search_audiobook(query)
-        return {"results": results}
+        results = await async_search_audiobook(query, use_cache=not (refresh and user.role == "admin"))
+        response = process_results(results, query, limit, offset)
+        get_magnet_resolver().prefetch(response["results"], MAGNET_PREFETCH_COUNT)
+        return ORJSONResponse(response)
     except Exception as e:
         logger.error(f"Search failed: {e}")
         raise HTTPException(status_code=500, detail="Search failed")
 
+@app.get("/search/stream")
+async def search_stream(
+    query: str = Query(..., description="Search query"),
+    refresh: bool = Query(False, description="Bypass the search cache (admins only)"),
+    limit: int = Query(100, ge=1, le=500, description="Maximum results to show"),
+    user: User = Depends(authenticate)
+):
+    """Newline-delimited JSON: one event per indexer as it answers, then a summary.
+
+    Each results event carries the best `limit` results so far, ranked, replacing the
+    previous window, and the number of unique results seen.
+    """
+    async def events():
+        # Mirrors return the same releases, so only the first copy of each counts
+        deduplicator = Deduplicator()
+        resolver = get_magnet_resolver()
+        window = []
+        unique = 0
+        try:
+            async for event in stream_search(query, use_cache=not (refresh and user.role == "admin")):
+                if event["type"] == "results":
+                    fresh = deduplicator.filter(event["results"])
+                    unique += len(fresh)
+                    # Anything that fell out of the window can't outrank what's in it,
+                    # so only the window and the new batch need ranking
+                    window = rank(window + fresh, query)[:limit]
+                    event["results"] = [project(result) for result in window]
+                    event["total"] = unique
+                    # The first rows on screen are the likeliest to be added
+                    resolver.prefetch(window[:MAGNET_PREFETCH_COUNT], MAGNET_PREFETCH_COUNT)
+                else:
+                    event["total"] = unique
+                yield orjson.dumps(event) + b"\n"
+        except Exception as e:
+            logger.error(f"Streaming search failed: {e}")
+            yield orjson.dumps({"type": "error", "message": "Search failed"}) + b"\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+# Background Jackett searches started by /suggest, referenced until they finish
+_warmups = set()
+
+@app.get("/suggest")
+async def suggest(
+    q: str = Query(..., min_length=1, description="Partial search text"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum suggestions"),
+    warm: bool = Query(False, description="Start the full Jackett search in the background"),
+    user: User = Depends(authenticate)
+):
+    """Typeahead from previously seen results; optionally warms the search cache for q"""
+    suggestions = await run_in_threadpool(get_search_index().suggest, q, limit)
+    # Warmups are full Jackett fan-outs, so only a few run at a time however fast people type
+    warming = warm and len(q.strip()) >= SUGGEST_WARM_MIN_CHARS and len(_warmups) < SUGGEST_MAX_WARMUPS \
+        and not is_search_cached(q)
+    if warming:
+        task = asyncio.create_task(async_search_audiobook(q))
+        _warmups.add(task)
+        task.add_done_callback(_warmups.discard)
+    return ORJSONResponse({"suggestions": suggestions, "warming": warming})
+
+@app.get("/search/cache")
+def search_cache_stats(user: User = Depends(validate_admin)):
+    return search_cache.stats()
+
+@app.delete("/search/cache")
+def purge_search_cache(user: User = Depends(validate_admin)):
+    removed = search_cache.clear()
+    return {"status": "ok", "message": f"Removed {removed} cached searches"}
+
 @app.post("/add")
-def add(
+async def add(
     torrent: TorrentRequest,
     user: User = Depends(authenticate)
 ):
     try:
-        success = add_torrent(torrent.url, user)
+        success = await get_async_torrent_service().add_torrent(torrent.url, user)
         if success:
             return {"status": "ok", "message": "Torrent added successfully"}
         else:
@@ -257,22 +370,36 @@ def add(
         logger.error(f"Add failed: {e}")
         raise HTTPException(status_code=500, detail="Add failed")
 
-@app.get("/list")
-def list_torrents(user: User = Depends(authenticate)):
+@app.get("/list", response_model=List[TorrentRow])
+async def list_torrents(user: User = Depends(authenticate)):
     try:
-        return get_torrents(user)
+        return ORJSONResponse(await get_async_torrent_service().get_torrents(user))
     except Exception as e:
         logger.error(f"List torrents failed: {e}")
         raise HTTPException(status_code=500, detail="Failed to list torrents")
 
+@app.get("/torrent/{torrent_id}/files")
+async def torrent_files_endpoint(torrent_id: str, user: User = Depends(authenticate)):
+    try:
+        files = await get_async_torrent_service().get_torrent_files(torrent_id, user)
+    except TorrentClientUnavailable as e:
+        logger.error(f"Get torrent files failed: {e}")
+        raise HTTPException(status_code=502, detail=f"Torrent client unavailable, could not get files for torrent {torrent_id}")
+    except Exception as e:
+        logger.error(f"Get torrent files failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to get files for torrent {torrent_id}")
+    if files is None:
+        raise HTTPException(status_code=404, detail=f"Torrent {torrent_id} not found")
+    return {"files": files}
+
 @app.delete("/torrent/{torrent_id}")
-def delete_torrent_endpoint(
+async def delete_torrent_endpoint(
     torrent_id: str,
     delete_data: bool = Query(True, description="Delete downloaded data as well"),
     user: User = Depends(authenticate)
 ):
     try:
-        if delete_torrent(torrent_id, user, delete_data=delete_data):
+        if await get_async_torrent_service().delete_torrent(torrent_id, user, delete_data=delete_data):
             return {"status": "ok", "message": f"Torrent {torrent_id} deleted successfully."}
         else:
             raise HTTPException(status_code=500, detail=f"Failed to delete torrent {torrent_id}")
@@ -281,12 +408,12 @@ def delete_torrent_endpoint(
         raise HTTPException(status_code=500, detail=f"Delete torrent failed: {e}")
 
 @app.post("/torrent/{torrent_id}/pause")
-def pause_torrent_endpoint(
+async def pause_torrent_endpoint(
     torrent_id: str,
     user: User = Depends(authenticate)
 ):
     try:
-        if pause_torrent(torrent_id, user):
+        if await get_async_torrent_service().pause_torrent(torrent_id, user):
             return {"status": "ok", "message": f"Torrent {torrent_id} paused successfully."}
         else:
             raise HTTPException(status_code=500, detail=f"Failed to pause torrent {torrent_id}")
@@ -295,12 +422,12 @@ def pause_torrent_endpoint(
         raise HTTPException(status_code=500, detail=f"Pause torrent failed: {e}")
 
 @app.post("/torrent/{torrent_id}/play")
-def play_torrent_endpoint(
+async def play_torrent_endpoint(
     torrent_id: str,
     user: User = Depends(authenticate)
 ):
     try:
-        if resume_torrent(torrent_id, user):
+        if await get_async_torrent_service().resume_torrent(torrent_id, user):
             return {"status": "ok", "message": f"Torrent {torrent_id} resumed successfully."}
         else:
             raise HTTPException(status_code=500, detail=f"Failed to resume torrent {torrent_id}")
@@ -309,36 +436,62 @@ def play_torrent_endpoint(
         raise HTTPException(status_code=500, detail=f"Resume torrent failed: {e}")
 
 @app.post("/torrent/{torrent_id}/category")
-def set_category_endpoint(
+async def set_category_endpoint(
     torrent_id: str,
     category_request: CategoryRequest,
     user: User = Depends(authenticate)
 ):
     """Set category for a torrent (qBittorrent only)"""
     try:
-        if set_category(torrent_id, user, category_request.category):
+        if await get_async_torrent_service().set_category(torrent_id, user, category_request.category):
             return {"status": "ok", "message": f"Category set to '{category_request.category}' for torrent {torrent_id}"}
         else:
             raise HTTPException(status_code=500, detail=f"Failed to set category for torrent {torrent_id}")
     except Exception as e:
         logger.error(f"Set category failed: {e}")
         raise HTTPException(status_code=500, detail=f"Set category failed: {e}")
+
+@app.post("/torrents/batch")
+async def batch_torrents_endpoint(
+    batch: BatchRequest,
+    user: User = Depends(authenticate)
+):
+    """Pause, resume, delete or set the category of many torrents in one client call"""
+    if not batch.ids:
+        raise HTTPException(status_code=400, detail="No torrent ids given")
+    if batch.action == BatchAction.set_category and not (batch.category or "").strip():
+        raise HTTPException(status_code=400, detail="Category name is required")
+
+    result = await get_async_torrent_service().batch_action(
+        batch.action, batch.ids, user, batch.delete_data, (batch.category or "").strip()
+    )
+    if result["denied"] and not result["applied"] and not result["failed"]:
+        raise HTTPException(status_code=403, detail="Access forbidden for the selected torrents")
+    if result["failed"]:
+        raise HTTPException(status_code=500, detail=f"Failed to {batch.action.value} {len(result['failed'])} torrents")
+    return {
+        "status": "ok",
+        "message": f"{batch.action.value} applied to {len(result['applied'])} torrents.",
+        **result
+    }
+
 @app.post("/selectCandidate/{hash_string}/{candidate_id}")
-def select_candidate_endpoint(hash_string: str, candidate_id: str, user: User = Depends(authenticate)):
+async def select_candidate_endpoint(hash_string: str, candidate_id: str, user: User = Depends(authenticate)):
     try:
-        select_candidate(hash_string, candidate_id)
-        remove_label_from_torrent_with_hash(hash_string, user, BEETS_ERROR_LABEL)
+        await run_in_threadpool(select_candidate, hash_string, candidate_id)
+        await get_async_torrent_service().remove_label_from_torrent_with_hash(hash_string, user, BEETS_ERROR_LABEL)
         return {"status": "ok", "message": f"Candidate {candidate_id} selected for torrent {hash_string}"}
     except Exception as e:
         logger.error(f"Select candidate failed: {e}")
         raise HTTPException(status_code=500, detail=f"Select candidate failed: {e}")
 
 @app.post("/autoimport")
-def autoimport_endpoint():
+async def autoimport_endpoint():
     try:
-        autoimport()
-        delete_old_torrents()
-        pause_stale_torrents()
+        torrent_service = get_async_torrent_service()
+        await torrent_service.run(autoimport)
+        await torrent_service.run(delete_old_torrents)
+        await torrent_service.run(pause_stale_torrents)
         return {"status": "ok", "message": "Auto-import completed successfully"}
     except Exception as e:
         logger.error(f"Auto-import failed: {e}")
@@ -366,7 +519,8 @@ def save_goodreads_config_endpoint(config: GoodreadsConfigRequest, user: User =
             enabled=config.enabled
         )
         
-        setup_goodreads_scheduler()
+        # Only this user's schedule changes
+        schedule_goodreads_user(result)
         
         return result
     except Exception as e:
@@ -374,19 +528,19 @@ def save_goodreads_config_endpoint(config: GoodreadsConfigRequest, user: User =
         raise HTTPException(status_code=500, detail=f"Failed to save config: {e}")
 
 @app.post("/goodreads/validate")
-def validate_goodreads_endpoint(config: GoodreadsConfigRequest, user: User = Depends(authenticate)):
+async def validate_goodreads_endpoint(config: GoodreadsConfigRequest, user: User = Depends(authenticate)):
     if not GOODREADS_ENABLED:
         raise HTTPException(status_code=404, detail="Goodreads integration is not enabled")
     
-    return validate_goodreads_config(config.goodreads_user_id, config.shelf)
+    return await run_in_threadpool(validate_goodreads_config, config.goodreads_user_id, config.shelf)
 
 @app.post("/goodreads/poll")
-def trigger_goodreads_poll(user: User = Depends(authenticate)):
+async def trigger_goodreads_poll(user: User = Depends(authenticate)):
     if not GOODREADS_ENABLED:
         raise HTTPException(status_code=404, detail="Goodreads integration is not enabled")
     
     try:
-        result = poll_and_download_single_user(user.id)
+        result = await run_in_threadpool(poll_and_download_single_user, user.id)
         return result
     except Exception as e:
         logger.error(f"Manual poll failed: {e}")
@@ -418,6 +572,9 @@ def clear_all_processed_books_endpoint(user: User = Depends(authenticate)):
     return {"status": "ok", "message": f"Cleared {count} processed books"}
 
 
+_CONFIG_INPUT_TYPES = {bool: "boolean", int: "number"}
+
+
 @app.get("/config")
 def get_app_config(user: User = Depends(validate_admin)):
     configs = get_all_effective_configs()
@@ -426,7 +583,7 @@ def get_app_config(user: User = Depends(validate_admin)):
     for key, value in configs.items():
         s = schema.get(key, {})
         is_sensitive = s.get("sensitive", False)
-        # Filter out non-serializable fields (like 'type' which is a Python type)
+        # 'type' is a Python type, so the UI gets its name as an input kind instead
         result[key] = {
             "value": "********" if is_sensitive and value else value,
             "has_value": bool(value) if is_sensitive else None,
@@ -434,20 +591,32 @@ def get_app_config(user: User = Depends(validate_admin)):
             "group": s.get("group", "app"),
             "sensitive": is_sensitive,
             "options": s.get("options"),
+            "type": _CONFIG_INPUT_TYPES.get(s.get("type"), "string"),
         }
     return result
 
 
 @app.post("/config")
 def save_app_config(update: AppConfigUpdate, user: User = Depends(validate_admin)):
-    saved_keys = []
+    updates = {}
     for key, value in update.configs.items():
         if key not in CONFIG_SCHEMA:
             continue
         if CONFIG_SCHEMA[key].get("sensitive") and value == "********":
             continue
+        # DB values are returned as saved, so numbers must not be stored as strings
+        if CONFIG_SCHEMA[key]["type"] is int and not isinstance(value, int):
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail=f"{CONFIG_SCHEMA[key]['label']} must be a whole number")
+        updates[key] = value
+    saved_keys = []
+    for key, value in updates.items():
         set_config(key, value)
         saved_keys.append(key)
+    # Timeouts are read per backend on first use, so new values apply without a restart
+    reset_backends()
     
     return {"status": "ok", "saved": saved_keys, "message": "Configuration saved. Restart may be required for some changes to take effect."}
 
@@ -488,15 +657,14 @@ def test_torrent_connection(user: User = Depends(validate_admin)):
 
 
 @app.post("/config/test-jackett")
-def test_jackett_connection(user: User = Depends(validate_admin)):
+async def test_jackett_connection(user: User = Depends(validate_admin)):
     try:
-        from .audiobookbay import search_audiobook
         url = get_effective_config("jackett_api_url")
         api_key = get_effective_config("jackett_api_key")
         if not url or not api_key:
             return {"success": False, "message": "Jackett URL or API key not configured"}
         
-        results = search_audiobook("test", url, api_key)
+        results = await async_search_audiobook("test", url, api_key, use_cache=False)
         return {"success": True, "message": f"Connected successfully. Search returned {len(results)} results."}
     except Exception as e:
         return {"success": False, "message": str(e)}
@@ -0,0 +1,96 @@
+"""
+Matching Goodreads books to Jackett results.
+
+Goodreads titles rarely match release names as-is ("Abaddon's Gate (The Expanse, #3)"),
+so each book is searched under several query variants at once, within a time budget,
+and the results of all variants are merged into one ranked list.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List
+
+from .audiobookbay import is_search_cached, search_audiobook
+from .constants import JACKETT_RATE_LIMIT, MATCH_BUDGET_SECONDS, MATCH_SEARCH_WORKERS
+from .pipeline import RateLimiter
+from .results import dedupe, rank
+from .scoring import clean_title, strip_series
+from .utils import custom_logger
+
+logger = custom_logger(__name__)
+
+# Shared by all books so a big shelf can't open unbounded connections to Jackett
+_executor = ThreadPoolExecutor(max_workers=MATCH_SEARCH_WORKERS, thread_name_prefix="goodreads-match")
+_jackett_limiter = RateLimiter(JACKETT_RATE_LIMIT, burst=MATCH_SEARCH_WORKERS)
+# How many budgets a book may wait in the pool queue before its budget starts anyway
+QUEUE_WAIT_FACTOR = 4
+
+
+def _limited_search(query: str) -> List[Dict[str, Any]]:
+    # Cached queries don't reach Jackett, so they don't spend a token
+    if not is_search_cached(query):
+        _jackett_limiter.acquire()
+    return search_audiobook(query)
+
+
+def build_query_variants(book: Dict[str, Any]) -> List[str]:
+    """Distinct search queries for a book, most specific first"""
+    title = book.get("title", "")
+    author = " ".join((book.get("author") or "").split())
+    short_title = strip_series(title)
+    candidates = [
+        f"{short_title} {author}" if author else "",
+        short_title,
+        clean_title(title),
+        (book.get("isbn") or "").strip(),
+    ]
+    variants, seen = [], set()
+    for query in candidates:
+        key = query.casefold()
+        if query and key not in seen:
+            seen.add(key)
+            variants.append(query)
+    return variants
+
+
+def search_variants(book: Dict[str, Any], budget: float = MATCH_BUDGET_SECONDS) -> List[Dict[str, Any]]:
+    """Search all variants of a book concurrently and return the merged results, best first.
+
+    The budget starts when the first variant starts running, not while the book waits
+    in the shared pool behind other books. Variants still running when it runs out are
+    left to finish in the background (their results still land in the search cache);
+    variants that haven't started yet are cancelled.
+    """
+    variants = build_query_variants(book)
+    if not variants:
+        return []
+
+    started = threading.Event()
+
+    def run(query: str) -> List[Dict[str, Any]]:
+        started.set()
+        return _limited_search(query)
+
+    futures = {_executor.submit(run, query): query for query in variants}
+    # Time queued behind other books doesn't count, though a wedged pool can't hold us forever
+    if not started.wait(timeout=QUEUE_WAIT_FACTOR * budget):
+        logger.warning(f"Searches for '{book.get('title')}' waited over {QUEUE_WAIT_FACTOR * budget}s to start")
+    done, pending = wait(futures, timeout=budget)
+    if pending:
+        # Only futures that haven't started can be cancelled; running ones finish into the cache
+        for future in pending:
+            future.cancel()
+        logger.warning(
+            f"Search budget of {budget}s exceeded for '{book.get('title')}', "
+            f"skipping: {', '.join(futures[future] for future in pending)}"
+        )
+
+    merged = []
+    for future in done:
+        try:
+            merged.extend(future.result())
+        except Exception as e:
+            logger.error(f"Variant search '{futures[future]}' failed: {e}")
+
+    logger.info(f"{len(variants)} queries for '{book.get('title')}' returned {len(merged)} results")
+    return rank(dedupe(merged), variants[0])
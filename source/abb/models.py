@@ -1,11 +1,20 @@
 from enum import Enum
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel
+# pydantic only accepts typing_extensions.TypedDict before Python 3.12
+from typing_extensions import TypedDict
 
 class TorrentClientType(str, Enum):
     transmission = "transmission"
     decypharr = "decypharr"
     qbittorrent = "qbittorrent"
 
+class BatchAction(str, Enum):
+    pause = "pause"
+    resume = "resume"
+    delete = "delete"
+    set_category = "set_category"
+
 class User(BaseModel):
     username: str = "default"
     role: str = "user" 
@@ -13,3 +22,50 @@ class User(BaseModel):
 
 class TorrentRequest(BaseModel):
     url: str
+
+class BatchRequest(BaseModel):
+    action: BatchAction
+    ids: List[str]
+    delete_data: bool = True
+    category: Optional[str] = None
+
+class TorrentRow(TypedDict, total=False):
+    """One torrent as returned by the clients' get_torrents and /list"""
+    id: Any
+    labels: List[str]
+    name: str
+    status: str
+    total_size: int
+    percent_done: float
+    downloaded_ever: int
+    uploaded_ever: int
+    added_date: int
+    activity_date: int
+    use_beets_import: bool
+    imported: bool
+    importError: bool
+    eta: int
+    candidates: List[Dict[str, Any]]
+    hash_string: str
+    added_by: Optional[str]
+    upload_ratio: float
+
+class SearchResult(TypedDict):
+    """A Jackett result projected down to the fields the UI uses"""
+    Guid: Optional[str]
+    Title: Optional[str]
+    Size: Optional[int]
+    Poster: Optional[str]
+    MagnetUri: Optional[str]
+    Link: Optional[str]
+    Seeders: Optional[int]
+    Peers: Optional[int]
+    Tracker: Optional[str]
+    PublishDate: Optional[str]
+    InfoHash: Optional[str]
+
+class SearchResponse(TypedDict):
+    results: List[SearchResult]
+    total: int
+    limit: int
+    offset: int
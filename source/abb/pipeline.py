@@ -0,0 +1,120 @@
+"""
+Small building blocks for staged, backpressured work: a token-bucket rate limiter
+and a threaded map stage connected to its producer and consumer by bounded queues.
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+from .utils import custom_logger
+
+logger = custom_logger(__name__)
+
+_DONE = object()
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` calls per second with bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _put(q: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    """Blocking put that gives up once stop is set; False if it gave up"""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event) -> Any:
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def staged_map(
+    items: Iterable[Any],
+    fn: Callable[[Any], Any],
+    workers: int,
+    queue_size: int,
+    name: str = "stage",
+) -> Iterator[Tuple[Any, Any, Optional[Exception]]]:
+    """Run fn over items on `workers` threads and yield (item, result, error) as each finishes.
+
+    A producer thread feeds items through a bounded queue and results come back through
+    another, so at most about 2 * queue_size + workers items are in flight: a slow
+    consumer stalls the workers, and stalled workers stall the producer. Closing the
+    generator early stops all threads.
+    """
+    workers = max(1, workers)
+    inbox: queue.Queue = queue.Queue(maxsize=queue_size)
+    outbox: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in items:
+                if not _put(inbox, item, stop):
+                    return
+        finally:
+            for _ in range(workers):
+                if not _put(inbox, _DONE, stop):
+                    return
+
+    def work():
+        while True:
+            item = _get(inbox, stop)
+            if item is _DONE:
+                _put(outbox, _DONE, stop)
+                return
+            try:
+                outcome = (item, fn(item), None)
+            except Exception as e:
+                logger.error(f"{name} failed for {item!r}: {e}")
+                outcome = (item, None, e)
+            if not _put(outbox, outcome, stop):
+                return
+
+    threads = [threading.Thread(target=produce, name=f"{name}-producer", daemon=True)]
+    threads += [threading.Thread(target=work, name=f"{name}-{i}", daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    finished = 0
+    try:
+        while finished < workers:
+            outcome = outbox.get()
+            if outcome is _DONE:
+                finished += 1
+                continue
+            yield outcome
+    finally:
+        stop.set()
@@ -0,0 +1,96 @@
+"""
+Post-processing of Jackett search results: dedup, ranking, projection and paging.
+"""
+
+import math
+import re
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, List, Optional
+
+from .models import SearchResponse, SearchResult
+
+# The only fields the UI and the add flow use
+PROJECTED_FIELDS = (
+    "Guid", "Title", "Size", "Poster", "MagnetUri", "Link",
+    "Seeders", "Peers", "Tracker", "PublishDate", "InfoHash",
+)
+
+# Plausible audiobook sizes; anything outside is ranked down
+MIN_AUDIOBOOK_SIZE = 20 * 1024 * 1024
+MAX_AUDIOBOOK_SIZE = 8 * 1024 * 1024 * 1024
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_title(title: str) -> str:
+    return " ".join(_NON_WORD.sub(" ", (title or "").casefold()).split())
+
+
+class Deduplicator:
+    """Drops results already seen by info-hash, or by normalized title and size"""
+
+    def __init__(self):
+        self._hashes = set()
+        self._titles = set()
+
+    def filter(self, results: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        unique = []
+        for result in results:
+            info_hash = (result.get("InfoHash") or "").lower()
+            title_key = (normalize_title(result.get("Title", "")), result.get("Size"))
+            if (info_hash and info_hash in self._hashes) or title_key in self._titles:
+                continue
+            if info_hash:
+                self._hashes.add(info_hash)
+            self._titles.add(title_key)
+            unique.append(result)
+        return unique
+
+
+def dedupe(results: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return Deduplicator().filter(results)
+
+
+def _size_score(size: Optional[int]) -> float:
+    if not size:
+        return 0.0
+    if MIN_AUDIOBOOK_SIZE <= size <= MAX_AUDIOBOOK_SIZE:
+        return 1.0
+    return 0.0 if size < MIN_AUDIOBOOK_SIZE else 0.5
+
+
+def rank(results: List[Dict[str, Any]], query: str) -> List[Dict[str, Any]]:
+    """Sort best-first by title similarity to the query, seeders and size plausibility"""
+    normalized_query = normalize_title(query)
+    max_seeders = max((result.get("Seeders") or 0 for result in results), default=0)
+    seeder_scale = math.log1p(max_seeders) or 1.0
+
+    def score(result: Dict[str, Any]) -> float:
+        title = normalize_title(result.get("Title", ""))
+        similarity = SequenceMatcher(None, normalized_query, title).ratio() if normalized_query else 0.0
+        # Every query word appearing in the title matters more than character-level similarity
+        if normalized_query and all(word in title for word in normalized_query.split()):
+            similarity = max(similarity, 0.9)
+        seeders = math.log1p(result.get("Seeders") or 0) / seeder_scale
+        return 2.0 * similarity + seeders + 0.5 * _size_score(result.get("Size"))
+
+    return sorted(results, key=score, reverse=True)
+
+
+def project(result: Dict[str, Any]) -> SearchResult:
+    return {field: result.get(field) for field in PROJECTED_FIELDS}
+
+
+def paginate(results: List[Dict[str, Any]], limit: int, offset: int = 0) -> List[Dict[str, Any]]:
+    return results[offset:offset + limit]
+
+
+def process_results(results: List[Dict[str, Any]], query: str, limit: int, offset: int = 0) -> SearchResponse:
+    """Full /search pipeline: dedupe, rank, page, then project only the returned page"""
+    ranked = rank(dedupe(results), query)
+    return {
+        "results": [project(result) for result in paginate(ranked, limit, offset)],
+        "total": len(ranked),
+        "limit": limit,
+        "offset": offset,
+    }
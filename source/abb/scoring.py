@@ -0,0 +1,203 @@
+"""
+Confidence scoring of Jackett results against a Goodreads book.
+
+Every signal is computed column by column over the whole result list (title and
+author similarity, availability, size plausibility, excluded keywords, credits to
+another author) and the columns are combined into a 0-1 confidence per result. The best result is only
+worth adding when its confidence clears the caller's threshold.
+"""
+
+import math
+import re
+from difflib import SequenceMatcher, get_close_matches
+from statistics import median
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .results import MAX_AUDIOBOOK_SIZE, MIN_AUDIOBOOK_SIZE, normalize_title
+
+# "(The Expanse, #3)", "(Discworld #12)", "(Book 2)" at the end of a title
+_SERIES_SUFFIX = re.compile(r"\s*\((?:[^()]*?[,\s])?(?:#|book\s+)\s*\d+(?:\.\d+)?\)\s*$", re.IGNORECASE)
+_BRACKETED = re.compile(r"\s*[\(\[][^\)\]]*[\)\]]")
+_NOISE = re.compile(r"[^\w\s'&-]+", re.UNICODE)
+# Separators between the parts of "Author - Title - Narrator" and "Title by Author" release names
+_PARTS = re.compile(r"\s+[-\u2013\u2014]\s+|\s+by\s+", re.IGNORECASE)
+
+# Words release names add around the title; ignored when comparing titles
+_RELEASE_NOISE = frozenset({
+    "unabridged", "audiobook", "audio", "book", "mp3", "m4b", "m4a", "flac", "aac", "ogg",
+    "kbps", "vbr", "cbr", "narrated", "read", "by", "retail", "complete", "edition",
+})
+
+# Title similarity counts on its own; the other weights are scaled by it
+WEIGHTS = {"title": 0.5, "author": 0.2, "availability": 0.15, "size": 0.15}
+# Subtracted from the confidence of releases naming an excluded keyword
+EXCLUDED_PENALTY = 0.4
+# Subtracted from the confidence of releases crediting someone other than the book's author
+OTHER_AUTHOR_PENALTY = 0.4
+# Seeders at which availability counts as fully healthy
+SEEDERS_SATURATION = 25
+# Releases this much smaller than the median of the list are likely samples or abridged
+SIZE_OUTLIER_RATIO = 0.25
+
+
+def clean_title(title: str) -> str:
+    """Title without bracketed parts and punctuation noise"""
+    cleaned = _NOISE.sub(" ", _BRACKETED.sub("", title or ""))
+    return " ".join(cleaned.split())
+
+
+def strip_series(title: str) -> str:
+    """Title without a trailing series marker or subtitle"""
+    stripped = _SERIES_SUFFIX.sub("", title or "")
+    return clean_title(stripped.split(":", 1)[0])
+
+
+def _coverage(wanted: Sequence[str], tokens: set) -> float:
+    """Share of wanted words found in tokens, allowing small typos in longer words"""
+    if not wanted:
+        return 0.0
+    found = 0
+    for word in wanted:
+        if word in tokens or (len(word) >= 4 and get_close_matches(word, tokens, n=1, cutoff=0.85)):
+            found += 1
+    return found / len(wanted)
+
+
+def _title_column(title: str, author_words: set, release_tokens: List[List[str]]) -> List[float]:
+    wanted = normalize_title(strip_series(title)).split()
+    wanted_text = " ".join(wanted)
+    scores = []
+    for tokens in release_tokens:
+        # Compare against the release name minus the author and format words, so extra
+        # words ("Dune Messiah" for "Dune") still cost something after full coverage
+        rest = " ".join(token for token in tokens if token not in author_words and token not in _RELEASE_NOISE)
+        similarity = SequenceMatcher(None, wanted_text, rest).ratio() if wanted_text else 0.0
+        scores.append(0.8 * _coverage(wanted, set(tokens)) + 0.2 * similarity)
+    return scores
+
+
+def _author_column(author: str, release_tokens: List[List[str]]) -> List[float]:
+    # Initials rarely survive into release names the same way ("J.R.R." vs "JRR")
+    wanted = [word for word in normalize_title(author).split() if len(word) > 1]
+    if not wanted:
+        return [0.5] * len(release_tokens)
+    return [_coverage(wanted, set(tokens)) for tokens in release_tokens]
+
+
+def _availability_column(seeders: List[Optional[int]], peers: List[Optional[int]]) -> List[float]:
+    scale = math.log1p(SEEDERS_SATURATION)
+    scores = []
+    for seed, peer in zip(seeders, peers):
+        if seed is None and peer is None:
+            scores.append(0.5)
+            continue
+        # Leechers still hold pieces, so they count for a little
+        leechers = max((peer or 0) - (seed or 0), 0)
+        scores.append(min(math.log1p((seed or 0) + 0.25 * leechers) / scale, 1.0))
+    return scores
+
+
+def _size_column(sizes: List[Optional[int]]) -> List[float]:
+    known = [size for size in sizes if size]
+    typical = median(known) if known else 0
+    scores = []
+    for size in sizes:
+        if not size:
+            scores.append(0.5)
+        elif size < MIN_AUDIOBOOK_SIZE:
+            scores.append(0.0)
+        elif size > MAX_AUDIOBOOK_SIZE:
+            scores.append(0.5)
+        elif size < SIZE_OUTLIER_RATIO * typical:
+            scores.append(0.3)
+        else:
+            scores.append(1.0)
+    return scores
+
+
+def _penalty_column(excluded: set, release_tokens: List[List[str]]) -> List[float]:
+    return [EXCLUDED_PENALTY if excluded.intersection(tokens) else 0.0 for tokens in release_tokens]
+
+
+def _names_someone(release_title: str, title_words: set) -> bool:
+    """Whether a part of the release name besides the title names someone ("Other Author - Title")"""
+    long_title_words = {word for word in title_words if len(word) > 3}
+    for part in _PARTS.split(_BRACKETED.sub("", release_title or "")):
+        words = normalize_title(part).split()
+        if long_title_words.intersection(words) or title_words.issuperset(words):
+            continue
+        if any(word.isalpha() and word not in _RELEASE_NOISE for word in words):
+            return True
+    return False
+
+
+def _other_author_column(
+    title: str, author: str, author_scores: List[float], release_titles: List[str]
+) -> List[float]:
+    # A release without an author is just terse; one crediting somebody else and none of
+    # the book's author is most likely another book with the same title
+    if not any(len(word) > 1 for word in normalize_title(author).split()):
+        return [0.0] * len(release_titles)
+    title_words = set(normalize_title(strip_series(title)).split())
+    return [
+        OTHER_AUTHOR_PENALTY if score == 0.0 and _names_someone(release_title, title_words) else 0.0
+        for score, release_title in zip(author_scores, release_titles)
+    ]
+
+
+def score_results(
+    book: Dict[str, Any],
+    results: List[Dict[str, Any]],
+    excluded: Iterable[str] = (),
+) -> List[float]:
+    """Confidence between 0 and 1 that each result is the book, in the order given"""
+    if not results:
+        return []
+    title = book.get("title") or ""
+    author = book.get("author") or ""
+    release_titles = [result.get("Title", "") for result in results]
+    release_tokens = [normalize_title(release_title).split() for release_title in release_titles]
+
+    # A keyword that is part of the book itself ("The Abridged Guide") isn't a reason to skip
+    book_words = set(normalize_title(f"{title} {author}").split())
+    excluded_words = {normalize_title(word) for word in excluded} - book_words - {""}
+
+    columns = {
+        "title": _title_column(title, set(normalize_title(author).split()), release_tokens),
+        "author": _author_column(author, release_tokens),
+        "availability": _availability_column(
+            [result.get("Seeders") for result in results], [result.get("Peers") for result in results]
+        ),
+        "size": _size_column([result.get("Size") for result in results]),
+    }
+    penalties = [
+        excluded + other_author
+        for excluded, other_author in zip(
+            _penalty_column(excluded_words, release_tokens),
+            _other_author_column(title, author, columns["author"], release_titles),
+        )
+    ]
+
+    support = [0.0] * len(results)
+    for name in ("author", "availability", "size"):
+        weight = WEIGHTS[name]
+        support = [total + weight * value for total, value in zip(support, columns[name])]
+    # The right author or a healthy torrent says little about a release of another book,
+    # so the other signals only count as far as the title matches
+    return [
+        min(max(WEIGHTS["title"] * similarity + similarity * extra - penalty, 0.0), 1.0)
+        for similarity, extra, penalty in zip(columns["title"], support, penalties)
+    ]
+
+
+def best_match(
+    book: Dict[str, Any],
+    results: List[Dict[str, Any]],
+    excluded: Iterable[str] = (),
+) -> Tuple[Optional[Dict[str, Any]], float]:
+    """Most confident result and its confidence; ties keep the earlier (better ranked) result"""
+    confidences = score_results(book, results, excluded)
+    if not confidences:
+        return None, 0.0
+    best = max(range(len(confidences)), key=confidences.__getitem__)
+    return results[best], confidences[best]
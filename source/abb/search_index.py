@@ -0,0 +1,170 @@
+"""
+Local full-text index of every result Jackett has returned, used for typeahead.
+
+Rows live in SQLite with an FTS5 index over the title. Builds of SQLite without
+FTS5 fall back to LIKE matching on the same table. The table is capped at
+SUGGEST_INDEX_MAX_ROWS, dropping the results seen longest ago first.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from .constants import DB_PATH, SUGGEST_FRESH_SECONDS, SUGGEST_INDEX_MAX_ROWS
+from .utils import custom_logger
+
+logger = custom_logger(__name__)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    size INTEGER,
+    seeders INTEGER,
+    info_hash TEXT,
+    link TEXT,
+    magnet TEXT,
+    seen_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_seeders ON results (seeders);
+CREATE INDEX IF NOT EXISTS results_seen_at ON results (seen_at);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS results_fts USING fts5(title, content='results', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS results_ai AFTER INSERT ON results BEGIN
+    INSERT INTO results_fts(rowid, title) VALUES (new.id, new.title);
+END;
+CREATE TRIGGER IF NOT EXISTS results_ad AFTER DELETE ON results BEGIN
+    INSERT INTO results_fts(results_fts, rowid, title) VALUES ('delete', old.id, old.title);
+END;
+CREATE TRIGGER IF NOT EXISTS results_au AFTER UPDATE OF title ON results BEGIN
+    INSERT INTO results_fts(results_fts, rowid, title) VALUES ('delete', old.id, old.title);
+    INSERT INTO results_fts(rowid, title) VALUES (new.id, new.title);
+END;
+"""
+
+UPSERT = """
+INSERT INTO results (key, title, size, seeders, info_hash, link, magnet, seen_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(key) DO UPDATE SET
+    title = excluded.title, size = excluded.size, seeders = excluded.seeders,
+    info_hash = excluded.info_hash, link = excluded.link, magnet = excluded.magnet,
+    seen_at = excluded.seen_at
+"""
+
+
+class SearchIndex:
+    """Thread-safe SQLite store of past search results with prefix search over titles"""
+
+    def __init__(self, path: str, max_rows: int = SUGGEST_INDEX_MAX_ROWS):
+        self.max_rows = max_rows
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            try:
+                self._conn.executescript(FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError as e:
+                logger.warning(f"SQLite FTS5 unavailable ({e}), suggestions fall back to LIKE matching")
+                self.fts = False
+            # Upper bound between prunes; upserts of known rows make it overcount, never under
+            self._rows = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    @staticmethod
+    def _row(result: Dict[str, Any], seen_at: float) -> Optional[tuple]:
+        title = result.get("Title")
+        info_hash = (result.get("InfoHash") or "").lower() or None
+        key = info_hash or result.get("Link") or result.get("Guid")
+        if not title or not key:
+            return None
+        return (
+            key, title, result.get("Size"), result.get("Seeders"), info_hash,
+            result.get("Link"), result.get("MagnetUri"), seen_at,
+        )
+
+    def record(self, results: Iterable[Dict[str, Any]]) -> None:
+        now = time.time()
+        rows = [row for row in (self._row(result, now) for result in results) if row]
+        if not rows:
+            return
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(UPSERT, rows)
+                self._rows += len(rows)
+                if self.max_rows and self._rows > self.max_rows:
+                    self._prune()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to record search results: {e}")
+
+    def _prune(self) -> None:
+        """Trim to 90% of max_rows so pruning doesn't run on every write near the cap"""
+        count = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        excess = count - int(self.max_rows * 0.9)
+        if count > self.max_rows and excess > 0:
+            # The delete trigger keeps the FTS index in step
+            self._conn.execute(
+                "DELETE FROM results WHERE id IN (SELECT id FROM results ORDER BY seen_at LIMIT ?)", (excess,)
+            )
+            count -= excess
+        self._rows = count
+
+    def suggest(self, text: str, limit: int = 10) -> List[Dict[str, Any]]:
+        tokens = _TOKEN.findall(text.casefold())
+        if not tokens:
+            return []
+        if self.fts:
+            # Every word must match, the last one as a prefix since the user is still typing it
+            match = " ".join(f'"{token}"' for token in tokens[:-1]) + f' "{tokens[-1]}"*'
+            sql = (
+                "SELECT r.* FROM results_fts JOIN results r ON r.id = results_fts.rowid "
+                "WHERE results_fts MATCH ? ORDER BY bm25(results_fts), r.seeders DESC LIMIT ?"
+            )
+            params: list = [match.strip(), limit]
+        else:
+            sql = "SELECT * FROM results WHERE " + " AND ".join(["title LIKE ?"] * len(tokens)) + \
+                " ORDER BY seeders DESC LIMIT ?"
+            params = [f"%{token}%" for token in tokens] + [limit]
+
+        try:
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Suggestion lookup failed: {e}")
+            return []
+
+        now = time.time()
+        return [
+            {
+                "Title": row["title"],
+                "Size": row["size"],
+                "Seeders": row["seeders"],
+                "InfoHash": row["info_hash"],
+                "Link": row["link"],
+                "MagnetUri": row["magnet"],
+                "seen_at": row["seen_at"],
+                "fresh": now - row["seen_at"] < SUGGEST_FRESH_SECONDS,
+            }
+            for row in rows
+        ]
+
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SearchIndex(os.path.join(DB_PATH, "search_index.db"))
+        return _index
@@ -0,0 +1,103 @@
+"""
+In-flight request coalescing.
+
+Concurrent calls with the same key share a single execution: the first caller
+runs the function and everyone who arrives while it is running gets its result.
+Followers only wait up to `wait_timeout` seconds; after that they give up on the
+leader and make their own call, so one hung request can't stall everybody.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from .utils import custom_logger
+
+logger = custom_logger(__name__)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls across threads"""
+
+    def __init__(self, wait_timeout: float):
+        self.wait_timeout = wait_timeout
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if leader:
+            try:
+                call.result = fn(*args, **kwargs)
+                return call.result
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+
+        if call.done.wait(self.wait_timeout):
+            if call.error is not None:
+                raise call.error
+            return call.result
+        logger.warning(f"Gave up waiting {self.wait_timeout}s for in-flight call {key!r}, calling again")
+        return fn(*args, **kwargs)
+
+
+class _LeaderCancelled(Exception):
+    """The leading coroutine was cancelled before producing a result"""
+
+
+class AsyncSingleFlight:
+    """Coalesce concurrent coroutine calls on one event loop"""
+
+    def __init__(self, wait_timeout: float):
+        self.wait_timeout = wait_timeout
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._calls[key] = future
+            try:
+                result = await fn(*args, **kwargs)
+                future.set_result(result)
+                return result
+            except asyncio.CancelledError:
+                # The leader's client went away; let followers make their own call
+                future.set_exception(_LeaderCancelled())
+                future.exception()
+                raise
+            except Exception as e:
+                future.set_exception(e)
+                # Mark the exception as retrieved in case nobody was waiting
+                future.exception()
+                raise
+            finally:
+                self._calls.pop(key, None)
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.wait_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Gave up waiting {self.wait_timeout}s for in-flight call {key!r}, calling again")
+        except _LeaderCancelled:
+            pass
+        return await fn(*args, **kwargs)
@@ -1,24 +1,88 @@
 from abc import abstractmethod, ABC
 import json
+import threading
 import requests
 import time
-from typing import List, Dict, Any, Optional
-from .models import User, TorrentClientType
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Any, Optional
+from .models import BatchAction, User, TorrentClientType
 from .constants import (
     ADMIN_USER_DICT, BEETS_COMPLETE_LABEL, BEETS_ERROR_LABEL, 
     DELETE_AFTER_DAYS, STRICTLY_DELETE_AFTER_DAYS, PAUSE_STALE_AFTER_DAYS, LABEL,
     TRANSMISSION_PASS, TRANSMISSION_URL, TRANSMISSION_USER, USE_BEETS_IMPORT,
-    QBITTORRENT_URL, QBITTORRENT_USERNAME, QBITTORRENT_PASSWORD, QBITTORRENT_CATEGORY
+    QBITTORRENT_URL, QBITTORRENT_USERNAME, QBITTORRENT_PASSWORD, QBITTORRENT_CATEGORY,
+    TRANSMISSION_POOL_SIZE, TRANSMISSION_FULL_SYNC_INTERVAL, FILE_FETCH_CONCURRENCY
 )
 from .db import get_candidates
+from .upstream import UpstreamSession
 from .utils import custom_logger
 
 logger = custom_logger(__name__)
 
 
+class TorrentClientUnavailable(Exception):
+    """The torrent client could not be reached or did not answer a request"""
+
+
+class OwnershipIndex:
+    """Maps torrent ids and info-hashes to the users labelled on them.
+
+    Built from the same user id / "username:" labels get_torrents filters on,
+    so an access check is a dictionary lookup instead of a full listing.
+    """
+
+    SYSTEM_LABELS = {LABEL, BEETS_COMPLETE_LABEL, BEETS_ERROR_LABEL}
+
+    def __init__(self):
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, labels: List[str]) -> Optional[Dict[str, Any]]:
+        if LABEL not in labels:
+            return None
+        owner_ids = set()
+        username = None
+        for label in labels:
+            if label.startswith("username:"):
+                username = label.split(":", 1)[1]
+            elif label not in self.SYSTEM_LABELS:
+                owner_ids.add(label)
+        return {"user_ids": frozenset(owner_ids), "username": username}
+
+    def set(self, keys: List[Any], labels: List[str]) -> None:
+        """Record the owners of the torrent known under keys (id, hash)"""
+        entry = self._entry(labels)
+        with self._lock:
+            for key in keys:
+                if entry is None:
+                    self._entries.pop(str(key), None)
+                else:
+                    self._entries[str(key)] = entry
+
+    def remove(self, keys: List[Any]) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(str(key), None)
+
+    def owner(self, key: Any) -> Optional[Dict[str, Any]]:
+        """Owner user ids and username of a torrent, None if unknown"""
+        return self._entries.get(str(key))
+
+    def owns(self, user_id: str, key: Any) -> bool:
+        entry = self._entries.get(str(key))
+        return entry is not None and user_id in entry["user_ids"]
+
+
 class TorrentClientInterface(ABC):
     """Abstract base class for torrent clients"""
 
+    # Set by TorrentService so reads are served from its shared snapshot
+    # instead of a fresh listing from the client
+    torrent_source: Optional[Callable[[], List[Dict[str, Any]]]] = None
+    # Clients keeping a local torrent table answer access checks from its index
+    # instead of listing the user's torrents
+    _ownership: Optional[OwnershipIndex] = None
+
     @abstractmethod
     def get_torrents(self, user: User) -> List[Dict[str, Any]]:
         """Get list of torrents for a user"""
@@ -59,6 +123,95 @@ class TorrentClientInterface(ABC):
         """Set category for a torrent (qBittorrent only, no-op for others)"""
         pass
 
+    def get_torrent_files(self, torrent_id: str) -> List[Dict[str, Any]]:
+        """Get the file list of a single torrent - optional implementation"""
+        return []
+
+    def get_files_for_torrents(self, torrent_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Get file lists for several torrents, fetching them concurrently"""
+        if not torrent_ids:
+            return {}
+        workers = min(FILE_FETCH_CONCURRENCY, len(torrent_ids))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="torrent-files") as executor:
+            return dict(zip(torrent_ids, executor.map(self.get_torrent_files, torrent_ids)))
+
+    def view_for_user(self, torrents: List[Dict[str, Any]], user: User) -> List[Dict[str, Any]]:
+        """Narrow an admin listing down to what get_torrents would return for user"""
+        if user.role == "admin":
+            return torrents
+        return [
+            dict(t, added_by=None)
+            for t in torrents
+            if user.id in (t.get("labels") or [])
+        ]
+
+    def list_torrents(self, user: User) -> List[Dict[str, Any]]:
+        """Torrents visible to user, read from the shared snapshot when one is attached"""
+        if self.torrent_source is None:
+            return self.get_torrents(user)
+        return self.view_for_user(self.torrent_source(), user)
+
+    def _get_torrent_table(self) -> Optional[List[Dict[str, Any]]]:
+        """Bring the local torrent table and _ownership up to date - clients keeping one override this"""
+        return None
+
+    def _check_user_access(self, user: User, torrent_id: str) -> bool:
+        """Check if user has access to torrent"""
+        if user.role == "admin":
+            return True
+        if self._ownership is None:
+            return any(str(t.get("id")) == torrent_id for t in self.list_torrents(user))
+
+        if not self._ownership.owns(user.id, torrent_id):
+            # The index may predate a torrent the user just added - catch up and look again
+            self._get_torrent_table()
+            if not self._ownership.owns(user.id, torrent_id):
+                logger.warning(f"User {user.id} tried to access torrent {torrent_id} without permission.")
+                return False
+        return True
+
+    def has_access(self, user: User, torrent_id: str) -> bool:
+        """Whether user may act on the torrent with this id"""
+        return self._check_user_access(user, torrent_id)
+
+    def _filter_accessible(self, user: User, torrent_ids: List[str]) -> List[str]:
+        """The subset of torrent_ids user may act on, catching the index up at most once"""
+        if user.role == "admin":
+            return list(torrent_ids)
+        if self._ownership is None:
+            return [torrent_id for torrent_id in torrent_ids if self._check_user_access(user, torrent_id)]
+
+        if not all(self._ownership.owns(user.id, torrent_id) for torrent_id in torrent_ids):
+            self._get_torrent_table()
+        allowed = [torrent_id for torrent_id in torrent_ids if self._ownership.owns(user.id, torrent_id)]
+        if len(allowed) != len(torrent_ids):
+            logger.warning(f"User {user.id} tried to access {len(torrent_ids) - len(allowed)} torrents without permission.")
+        return allowed
+
+    def batch_action(self, action: BatchAction, torrent_ids: List[str], user: User,
+                     delete_data: bool = True, category: str = None) -> Dict[str, List[str]]:
+        """Apply one action to many torrents with a single access check and client call"""
+        allowed = self._filter_accessible(user, torrent_ids)
+        denied = [torrent_id for torrent_id in torrent_ids if torrent_id not in allowed]
+        if allowed and not self._batch_request(action, allowed, delete_data, category):
+            return {"applied": [], "failed": allowed, "denied": denied}
+        return {"applied": allowed, "failed": [], "denied": denied}
+
+    def _batch_request(self, action: BatchAction, torrent_ids: List[str],
+                       delete_data: bool, category: Optional[str]) -> bool:
+        """Send action for already authorised torrents - clients override this with a real batch call"""
+        results = []
+        for torrent_id in torrent_ids:
+            if action == BatchAction.pause:
+                results.append(self.pause_torrent(torrent_id, ADMIN_USER_DICT))
+            elif action == BatchAction.resume:
+                results.append(self.resume_torrent(torrent_id, ADMIN_USER_DICT))
+            elif action == BatchAction.delete:
+                results.append(self.delete_torrent(torrent_id, ADMIN_USER_DICT, delete_data))
+            elif action == BatchAction.set_category:
+                results.append(self.set_category(torrent_id, ADMIN_USER_DICT, category))
+        return all(results)
+
     def delete_old_torrents(self) -> None:
         """Delete old completed torrents - optional implementation"""
         pass
@@ -71,57 +224,98 @@ class TorrentClientInterface(ABC):
 class TransmissionClient(TorrentClientInterface):
     """Transmission torrent client implementation"""
 
+    # Listing deliberately leaves out "files" - see get_torrent_files for the detail path
+    LIST_FIELDS = [
+        "id", "name", "status", "labels", "totalSize", "percentDone",
+        "downloadedEver", "uploadedEver", "addedDate", "activityDate", "uploadRatio",
+        "eta", "hashString"
+    ]
+    # Transmission only reports torrents active / removed within the last minute
+    # as "recently-active", so an older table can't be patched safely
+    RECENTLY_ACTIVE_WINDOW = 55
+
     def __init__(self, url: str = None, username: str = None, password: str = None):
         self.url = url or TRANSMISSION_URL
         self.username = username or TRANSMISSION_USER
         self.password = password or TRANSMISSION_PASS
-
-    def _get_session_id(self) -> Optional[str]:
-        """Get Transmission session ID"""
-        try:
-            response = requests.get(self.url, auth=(self.username, self.password))
-            return response.headers.get("X-Transmission-Session-Id")
-        except Exception as e:
-            logger.error(f"Failed to get Transmission session ID: {e}")
-            return None
+        # Keep-alive connection pool shared by every RPC made through this client
+        self.session = UpstreamSession("torrent", pool_maxsize=TRANSMISSION_POOL_SIZE)
+        self.session.auth = (self.username, self.password)
+        self._session_id: Optional[str] = None
+        self._session_lock = threading.Lock()
+        # Local mirror of Transmission's torrent list, patched from recently-active deltas
+        self._torrent_table: Dict[int, Dict[str, Any]] = {}
+        self._last_sync = 0.0
+        self._last_full_sync = 0.0
+        self._synced = False
+        self._sync_lock = threading.Lock()
+        self._ownership = OwnershipIndex()
+        self._rpc_version: Optional[int] = None
+
+    def _post(self, payload: Dict[str, Any]) -> requests.Response:
+        """POST an RPC payload, refreshing the cached session ID on HTTP 409"""
+        with self._session_lock:
+            session_id = self._session_id
+        headers = {"X-Transmission-Session-Id": session_id} if session_id else {}
+        response = self.session.post(self.url, json=payload, headers=headers)
+
+        if response.status_code == 409:
+            # Session ID missing or expired - Transmission hands out the new one with the 409
+            new_session_id = response.headers.get("X-Transmission-Session-Id")
+            with self._session_lock:
+                self._session_id = new_session_id
+            headers = {"X-Transmission-Session-Id": new_session_id} if new_session_id else {}
+            response = self.session.post(self.url, json=payload, headers=headers)
+        return response
 
     def _make_request(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Make authenticated request to Transmission"""
-        session_id = self._get_session_id()
-        if not session_id:
-            return None
-
-        headers = {"X-Transmission-Session-Id": session_id}
+        method = payload.get("method")
+        started = time.perf_counter()
         try:
-            logger.debug(f"Making Transmission request with payload: {payload} and headers: {headers} to {self.url}")
-            response = requests.post(
-                self.url, 
-                auth=(self.username, self.password), 
-                json=payload, 
-                headers=headers
-            )
+            logger.debug(f"Making Transmission request with payload: {payload} to {self.url}")
+            response = self._post(payload)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            logger.debug(f"Transmission {method} completed in {elapsed_ms:.1f}ms ({response.status_code})")
             if response.status_code == 200:
                 return response.json()
             else:
                 logger.error(f"Transmission request failed: {response.status_code} - {response.text}")
                 return None
         except Exception as e:
-            logger.error(f"Transmission request error: {e}")
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            logger.error(f"Transmission request error after {elapsed_ms:.1f}ms: {e}")
             return None
 
-    def _check_user_access(self, user: User, torrent_id: str) -> bool:
-        """Check if user has access to torrent"""
-        if user.role == "admin":
-            return True
-
-        torrents = self.get_torrents(user)
-        if torrents is None:
+    @staticmethod
+    def _rows_from_table(torrents: List[Any]) -> List[Dict[str, Any]]:
+        """Expand a format=table torrent-get response (header row + value rows) into dicts"""
+        if torrents and isinstance(torrents[0], list):
+            fields = torrents[0]
+            return [dict(zip(fields, row)) for row in torrents[1:]]
+        # Transmission < 3.00 ignores "format" and answers with objects
+        return torrents
+
+    def _batch_request(self, action: BatchAction, torrent_ids: List[str],
+                       delete_data: bool, category: Optional[str]) -> bool:
+        """Run a batch action as one RPC over the ids array"""
+        ids = [int(torrent_id) for torrent_id in torrent_ids]
+        if action == BatchAction.pause:
+            payload = {"method": "torrent-stop", "arguments": {"ids": ids}}
+        elif action == BatchAction.resume:
+            payload = {"method": "torrent-start", "arguments": {"ids": ids}}
+        elif action == BatchAction.delete:
+            payload = {"method": "torrent-remove", "arguments": {"ids": ids, "delete-local-data": delete_data}}
+        else:
+            logger.warning("Transmission does not support categories - use labels instead")
             return False
 
-        torrent_ids = [str(t.get("id", "")) for t in torrents]
-        if torrent_id not in torrent_ids:
-            logger.warning(f"User {user.id} tried to access torrent {torrent_id} without permission.")
+        response_data = self._make_request(payload)
+        if not response_data:
             return False
+        if action == BatchAction.delete:
+            self._drop_from_torrent_table(ids)
+        logger.info(f"Transmission {action.value} applied to {len(ids)} torrents.")
         return True
 
     def get_torrent_by_id(self, torrent_id: str) -> Optional[Dict[str, Any]]:
@@ -132,7 +326,7 @@ class TransmissionClient(TorrentClientInterface):
                 "fields": [
                     "id", "name", "status", "labels", "totalSize", "percentDone",
                     "downloadedEver", "uploadedEver", "addedDate", "uploadRatio",
-                    "files", "eta", "hashString"
+                    "eta", "hashString"
                 ],
                 "ids": [int(torrent_id)]
             }
@@ -147,24 +341,99 @@ class TransmissionClient(TorrentClientInterface):
             return torrents[0]
         return None
 
-    def get_torrents(self, user: User) -> List[Dict[str, Any]]:
-        """Get torrents filtered by user permissions"""
+    def get_torrent_files(self, torrent_id: str) -> List[Dict[str, Any]]:
+        """Get the file list of a single torrent"""
+        return self.get_files_for_torrents([torrent_id]).get(torrent_id, [])
+
+    def get_files_for_torrents(self, torrent_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Get file lists for several torrents in a single torrent-get"""
+        if not torrent_ids:
+            return {}
         payload = {
             "method": "torrent-get",
             "arguments": {
-                "fields": [
-                    "id", "name", "status", "labels", "totalSize", "percentDone",
-                    "downloadedEver", "uploadedEver", "addedDate", "activityDate", "uploadRatio",
-                    "files", "eta", "hashString"
-                ]
+                "fields": ["id", "files"],
+                "ids": [int(torrent_id) for torrent_id in torrent_ids],
+                "format": "table"
             }
         }
 
         response_data = self._make_request(payload)
-        if not response_data:
+        if not response_data or response_data.get("result") not in (None, "success"):
+            # An empty file list would read as "this torrent has no files"
+            raise TorrentClientUnavailable("Transmission did not return the file lists")
+
+        torrents = self._rows_from_table(response_data.get("arguments", {}).get("torrents", []))
+        return {str(t["id"]): t.get("files", []) for t in torrents}
+
+    def _sync_torrent_table(self) -> bool:
+        """Bring the local torrent table up to date, merging recently-active deltas"""
+        now = time.time()
+        full = (
+            not self._synced
+            or now - self._last_sync > self.RECENTLY_ACTIVE_WINDOW
+            or now - self._last_full_sync > TRANSMISSION_FULL_SYNC_INTERVAL
+        )
+        arguments: Dict[str, Any] = {"fields": self.LIST_FIELDS, "format": "table"}
+        if not full:
+            arguments["ids"] = "recently-active"
+
+        response_data = self._make_request({"method": "torrent-get", "arguments": arguments})
+        if not response_data or response_data.get("result") not in (None, "success"):
+            return False
+
+        result = response_data.get("arguments", {})
+        torrents = self._rows_from_table(result.get("torrents", []))
+        # A full listing fills a fresh index that replaces the old one in one assignment,
+        # so lock-free owns() checks never see it half rebuilt
+        ownership = OwnershipIndex() if full else self._ownership
+        if full:
+            self._torrent_table = {t["id"]: t for t in torrents}
+            self._last_full_sync = now
+        else:
+            for torrent in torrents:
+                self._torrent_table[torrent["id"]] = torrent
+            for torrent_id in result.get("removed", []):
+                removed = self._torrent_table.pop(torrent_id, None)
+                ownership.remove([torrent_id] + ([removed.get("hashString")] if removed else []))
+        for torrent in torrents:
+            ownership.set([torrent["id"], torrent.get("hashString", "")], torrent.get("labels", []))
+        self._ownership = ownership
+
+        self._last_sync = now
+        self._synced = True
+        return True
+
+    def _get_torrent_table(self) -> Optional[List[Dict[str, Any]]]:
+        """Sync and return the torrents in the local table, or None if it was never loaded"""
+        with self._sync_lock:
+            if not self._sync_torrent_table():
+                if not self._synced:
+                    return None
+                logger.warning("Transmission sync failed - serving last known torrent state")
+            return list(self._torrent_table.values())
+
+    def _patch_torrent_table(self, torrent_id: int, **fields: Any) -> None:
+        """Apply a change we made ourselves, since label edits don't mark a torrent active"""
+        with self._sync_lock:
+            torrent = self._torrent_table.get(torrent_id)
+            if torrent is not None:
+                torrent = dict(torrent, **fields)
+                self._torrent_table[torrent_id] = torrent
+                self._ownership.set([torrent_id, torrent.get("hashString", "")], torrent.get("labels", []))
+
+    def _drop_from_torrent_table(self, torrent_ids: List[int]) -> None:
+        with self._sync_lock:
+            for torrent_id in torrent_ids:
+                removed = self._torrent_table.pop(torrent_id, None)
+                self._ownership.remove([torrent_id] + ([removed.get("hashString")] if removed else []))
+
+    def get_torrents(self, user: User) -> List[Dict[str, Any]]:
+        """Get torrents filtered by user permissions"""
+        torrents = self._get_torrent_table()
+        if torrents is None:
             return []
 
-        torrents = response_data.get('arguments', {}).get('torrents', [])
         filtered_torrents = []
 
         for torrent in torrents:
@@ -205,7 +474,6 @@ class TransmissionClient(TorrentClientInterface):
                 "uploaded_ever": torrent["uploadedEver"],
                 "added_date": torrent["addedDate"],
                 "activity_date": torrent.get("activityDate", 0),
-                "files": torrent.get("files", []),
                 "use_beets_import": USE_BEETS_IMPORT,
                 "imported": imported,
                 "importError": import_error,
@@ -225,27 +493,86 @@ class TransmissionClient(TorrentClientInterface):
         if label is None:
             label = LABEL
 
-        # Convert to magnet if needed (from audiobookbay.py)
         logger.debug(f"Adding torrent URL: {torrent_url}")
-        torrent_url = self._get_jackett_magnet(torrent_url)
 
-        payload = {
-            "method": "torrent-add",
-            "arguments": {"filename": torrent_url}
-        }
+        labels = self._user_labels(user, label)
+        arguments: Dict[str, Any] = {"filename": torrent_url}
+        labels_on_add = self._supports_labels_on_add()
+        if labels_on_add:
+            arguments["labels"] = labels
 
-        response_data = self._make_request(payload)
+        response_data = self._make_request({"method": "torrent-add", "arguments": arguments})
         if not response_data:
             return False
 
-        try:
-            logger.debug(f"Transmission add_torrent response: {response_data}")
-            torrent_id = response_data['arguments']['torrent-added']['id']
-            self.add_label_to_torrent(torrent_id, user, label)
+        logger.debug(f"Transmission add_torrent response: {response_data}")
+        result = response_data.get("arguments") or {}
+        added = result.get("torrent-added")
+        duplicate = result.get("torrent-duplicate")
+        if added:
+            torrent_id = added["id"]
+            if not labels_on_add:
+                return self._set_labels(torrent_id, labels)
+            # Not in the table until the next sync, but the owner may act on it right away
+            self._ownership.set([torrent_id, added.get("hashString", "")], labels)
             return True
-        except (KeyError, TypeError) as e:
-            logger.exception(f"Error adding torrent: {e}")
+        if duplicate:
+            # Already in Transmission (e.g. added by another user) - make sure this user's labels are on it
+            torrent_id = duplicate["id"]
+            logger.info(f"Torrent already exists in Transmission: {duplicate.get('name')}")
+            current_labels = self._known_labels(torrent_id)
+            if current_labels is None:
+                return False
+            if set(labels) <= set(current_labels):
+                return True
+            return self._set_labels(torrent_id, list(set(current_labels) | set(labels)))
+
+        logger.error(f"Unexpected Transmission torrent-add response: {response_data}")
+        return False
+
+    def _user_labels(self, user: Optional[User], label: str) -> List[str]:
+        """Labels that mark a torrent as added by user"""
+        labels = [label]
+        if user:
+            labels.append(user.id)
+            if user.username:
+                labels.append(f"username:{user.username}")
+        return list(dict.fromkeys(labels))
+
+    def _supports_labels_on_add(self) -> bool:
+        """torrent-add accepts "labels" from RPC version 17 (Transmission 4.0)"""
+        if self._rpc_version is None:
+            response_data = self._make_request({"method": "session-get", "arguments": {"fields": ["rpc-version"]}})
+            if not response_data:
+                return False
+            self._rpc_version = response_data.get("arguments", {}).get("rpc-version", 0)
+        return self._rpc_version >= 17
+
+    def _known_labels(self, torrent_id: int) -> Optional[List[str]]:
+        """Labels of a torrent from the local table, asking Transmission only if it isn't there yet"""
+        torrent = self._torrent_table.get(torrent_id)
+        if torrent is not None:
+            return torrent.get("labels", [])
+        torrent = self.get_torrent_by_id(str(torrent_id))
+        if not torrent:
+            logger.warning(f"Failed to retrieve torrent with ID {torrent_id}")
+            return None
+        return torrent.get("labels", [])
+
+    def _set_labels(self, torrent_id: int, labels: List[str]) -> bool:
+        payload = {
+            "method": "torrent-set",
+            "arguments": {
+                "ids": [int(torrent_id)],
+                "labels": labels
+            }
+        }
+
+        response_data = self._make_request(payload)
+        if response_data is None:
             return False
+        self._patch_torrent_table(int(torrent_id), labels=labels)
+        return True
 
     def delete_torrent(self, torrent_id: str, user: User, delete_data: bool = True) -> bool:
         """Delete torrent from Transmission"""
@@ -265,6 +592,7 @@ class TransmissionClient(TorrentClientInterface):
 
         response_data = self._make_request(payload)
         if response_data:
+            self._drop_from_torrent_table([int(torrent_id)])
             logger.info(f"Torrent {torrent_id} {'and its data' if delete_data else ''} deleted successfully.")
             return True
         return False
@@ -304,60 +632,30 @@ class TransmissionClient(TorrentClientInterface):
 
     def add_label_to_torrent(self, torrent_id: str, user: User, label: str) -> bool:
         """Add label to torrent"""
-        torrent = self.get_torrent_by_id(torrent_id=torrent_id)
-        if not torrent:
-            logger.warning(f"Failed to retrieve torrent with ID {torrent_id}")
+        current_labels = self._known_labels(int(torrent_id))
+        if current_labels is None:
             return False
 
-        current_labels = torrent.get("labels", [])
         logger.debug(f"Current labels for torrent {torrent_id}: {current_labels}")
-        new_labels = list(set(current_labels + [label]))
-
-        # Add user labels
-        if user:
-            new_labels.append(user.id)
-            if user.username:
-                new_labels.append(f"username:{user.username}")
-            new_labels = list(set(new_labels))
-
-        payload = {
-            "method": "torrent-set",
-            "arguments": {
-                "ids": [int(torrent_id)],
-                "labels": new_labels
-            }
-        }
-
-        response_data = self._make_request(payload)
-        return response_data is not None
+        new_labels = list(set(current_labels) | set(self._user_labels(user, label)))
+        return self._set_labels(int(torrent_id), new_labels)
 
     def remove_label_from_torrent(self, torrent_id: str, user: User, label: str) -> bool:
         """Remove label from torrent"""
-        torrent = self.get_torrent_by_id(torrent_id)
-        if not torrent:
-            logger.warning(f"Failed to retrieve torrent with ID {torrent_id}")
+        current_labels = self._known_labels(int(torrent_id))
+        if current_labels is None:
             return False
 
-        current_labels = torrent.get("labels", [])
         new_labels = list(set(current_labels) - {label})
 
         if not new_labels:
             return True  # Nothing to do
 
-        payload = {
-            "method": "torrent-set",
-            "arguments": {
-                "ids": [int(torrent_id)],
-                "labels": new_labels
-            }
-        }
-
-        response_data = self._make_request(payload)
-        return response_data is not None
+        return self._set_labels(int(torrent_id), new_labels)
 
     def delete_old_torrents(self) -> None:
         """Delete old completed torrents"""
-        torrents = self.get_torrents(ADMIN_USER_DICT)
+        torrents = self.list_torrents(ADMIN_USER_DICT)
         torrents = [t for t in torrents if (
             "audiobook" in t.get("labels", []) and 
             BEETS_COMPLETE_LABEL in t.get("labels", []) and 
@@ -378,7 +676,7 @@ class TransmissionClient(TorrentClientInterface):
                 logger.info(f"DELETED: {torrent['name']}")
 
     def pause_stale_torrents(self) -> None:
-        torrents = self.get_torrents(ADMIN_USER_DICT)
+        torrents = self.list_torrents(ADMIN_USER_DICT)
         torrents = [t for t in torrents if (
             t.get("status") != "Stopped" and
             BEETS_COMPLETE_LABEL not in t.get("labels", [])
@@ -396,19 +694,6 @@ class TransmissionClient(TorrentClientInterface):
                 self.pause_torrent(str(torrent["id"]), user=ADMIN_USER_DICT)
                 logger.info(f"PAUSED STALE: {torrent['name']} (no activity for {int(days_since_activity)} days)")
 
-    def _get_jackett_magnet(self, url: str) -> str:
-        """Convert URL to magnet link if needed"""
-        try:
-            if url.startswith("magnet:"):
-                return url
-            response = requests.get(url, allow_redirects=False)
-            if response.status_code in [301, 302]:
-                return response.headers.get("Location", url)
-        except Exception as e:
-            logger.error(f"Error fetching magnet URL: {e}")
-            return url
-        return url
-
     def _get_torrent_status(self, status_code: int) -> str:
         """Convert status code to readable status"""
         status_map = {
@@ -433,7 +718,7 @@ class DecypharrClient(TorrentClientInterface):
     def __init__(self, url: str = "", api_key: str = ""):
         self.url = url.rstrip('/')
         self.api_key = api_key
-        self.session = requests.Session()
+        self.session = UpstreamSession("torrent")
         if api_key:
             # Set the API key in headers for authentication
             self.session.headers.update({"Authorization": f"Bearer {api_key}"})
@@ -509,7 +794,6 @@ class DecypharrClient(TorrentClientInterface):
                 "downloaded_ever": 0,  # Not available in Decypharr API
                 "uploaded_ever": 0,    # Not available in Decypharr API
                 "added_date": self._parse_date(torrent.get("addedOn", "")),
-                "files": [],  # Not available in this endpoint
                 "use_beets_import": False,  # Decypharr handles this differently
                 "imported": False,
                 "importError": False,
@@ -522,6 +806,10 @@ class DecypharrClient(TorrentClientInterface):
 
         return filtered_torrents
 
+    def view_for_user(self, torrents: List[Dict[str, Any]], user: User) -> List[Dict[str, Any]]:
+        """Decypharr is single-user, every user sees every torrent"""
+        return torrents
+
     def delete_torrents(self, hashes: List[str], remove_from_debrid: bool = False) -> bool:
         """Delete multiple torrents using Decypharr API"""
         params = {
@@ -534,6 +822,14 @@ class DecypharrClient(TorrentClientInterface):
             return False
         return True
 
+    def _batch_request(self, action: BatchAction, torrent_ids: List[str],
+                       delete_data: bool, category: Optional[str]) -> bool:
+        """Only deletion has a batch endpoint in Decypharr"""
+        if action != BatchAction.delete:
+            logger.warning(f"Decypharr batch {action.value} not implemented")
+            return False
+        return self.delete_torrents(torrent_ids, delete_data)
+
     def delete_single_torrent(self, category: str, hash_id: str, remove_from_debrid: bool = False) -> bool:
         """Delete single torrent by category and hash"""
         params = {'removeFromDebrid': str(remove_from_debrid).lower()}
@@ -633,8 +929,19 @@ class QBittorrentClient(TorrentClientInterface):
         self.url = (url or QBITTORRENT_URL).rstrip('/')
         self.username = username or QBITTORRENT_USERNAME
         self.password = password or QBITTORRENT_PASSWORD
-        self.session = requests.Session()
+        self.session = UpstreamSession("torrent")
         self._logged_in = False
+        # Local mirror of qBittorrent's torrent list, patched from /sync/maindata deltas
+        self._torrent_table: Dict[str, Dict[str, Any]] = {}
+        self._rid = 0
+        self._synced = False
+        self._sync_lock = threading.Lock()
+        self._ownership = OwnershipIndex()
+        # File lists don't change once metadata is known, so they are fetched on demand and kept
+        self._files_cache: Dict[str, List[Dict[str, Any]]] = {}
+        # Tags known to exist in qBittorrent, loaded once and then kept current locally
+        self._known_tags: Optional[set] = None
+        self._tags_lock = threading.Lock()
 
     def _login(self) -> bool:
         """Authenticate with qBittorrent and get session cookie"""
@@ -649,6 +956,8 @@ class QBittorrentClient(TorrentClientInterface):
             )
             if response.status_code == 200 and response.text == "Ok.":
                 self._logged_in = True
+                # A new session has no sync history on the server side
+                self._rid = 0
                 return True
             logger.error(f"qBittorrent login failed: {response.status_code} - {response.text}")
             return False
@@ -678,48 +987,144 @@ class QBittorrentClient(TorrentClientInterface):
             logger.error(f"qBittorrent API request failed: {e}")
             return None
 
-    def _check_user_access(self, user: User, torrent_hash: str) -> bool:
-        """Check if user has access to torrent"""
-        if user.role == "admin":
+    def _batch_request(self, action: BatchAction, torrent_ids: List[str],
+                       delete_data: bool, category: Optional[str]) -> bool:
+        """Run a batch action as one call with pipe-joined hashes"""
+        data = {"hashes": "|".join(torrent_ids)}
+        if action == BatchAction.pause:
+            endpoint = '/torrents/pause'
+        elif action == BatchAction.resume:
+            endpoint = '/torrents/resume'
+        elif action == BatchAction.delete:
+            endpoint = '/torrents/delete'
+            data["deleteFiles"] = "true" if delete_data else "false"
+        else:
+            endpoint = '/torrents/setCategory'
+            data["category"] = category
+
+        response = self._make_request('POST', endpoint, data=data)
+        if response and response.status_code == 200:
+            logger.info(f"qBittorrent {action.value} applied to {len(torrent_ids)} torrents.")
             return True
+        logger.error(f"qBittorrent batch {action.value} failed: {response.text if response else 'No response'}")
+        return False
 
-        torrents = self.get_torrents(user)
-        torrent_hashes = [t.get("hash_string", "") for t in torrents]
-        if torrent_hash not in torrent_hashes:
-            logger.warning(f"User {user.id} tried to access torrent {torrent_hash} without permission.")
-            return False
-        return True
+    def _load_tags(self) -> None:
+        """Fill the tag registry from /torrents/tags"""
+        response = self._make_request('GET', '/torrents/tags')
+        if not response or response.status_code != 200:
+            return
+        try:
+            self._known_tags = set(response.json())
+        except ValueError:
+            pass
 
     def _ensure_tags_exist(self, tags: List[str]) -> bool:
-        """Ensure tags exist in qBittorrent (create if they don't)"""
-        response = self._make_request('POST', '/torrents/createTags', data={"tags": ",".join(tags)})
-        return response is not None and response.status_code == 200
+        """Ensure tags exist in qBittorrent, creating only the ones not in the registry"""
+        with self._tags_lock:
+            if self._known_tags is None:
+                self._load_tags()
+            missing = [tag for tag in dict.fromkeys(tags) if tag not in (self._known_tags or set())]
+            if not missing:
+                return True
+
+            response = self._make_request('POST', '/torrents/createTags', data={"tags": ",".join(missing)})
+            if response is None or response.status_code != 200:
+                return False
+            if self._known_tags is not None:
+                self._known_tags.update(missing)
+            return True
+
+    def get_torrent_files(self, torrent_id: str) -> List[Dict[str, Any]]:
+        """Get files for a specific torrent, cached by info-hash once metadata is known"""
+        files = self._files_cache.get(torrent_id)
+        if files is not None:
+            return files
 
-    def _get_torrent_files(self, torrent_hash: str) -> List[Dict[str, Any]]:
-        """Get files for a specific torrent"""
-        response = self._make_request('GET', '/torrents/files', params={"hash": torrent_hash})
+        response = self._make_request('GET', '/torrents/files', params={"hash": torrent_id})
         if not response or response.status_code != 200:
-            return []
+            # An empty file list would read as "this torrent has no files"
+            status = response.status_code if response is not None else "no response"
+            raise TorrentClientUnavailable(f"qBittorrent did not return the files of {torrent_id} ({status})")
         try:
-            return response.json()
-        except:
-            return []
+            files = response.json()
+        except ValueError:
+            raise TorrentClientUnavailable(f"qBittorrent returned an unreadable file list for {torrent_id}")
+
+        # Magnets report no files until their metadata has been downloaded
+        state = self._torrent_table.get(torrent_id, {}).get("state")
+        if files and state != "metaDL":
+            self._files_cache[torrent_id] = files
+        return files
+
+    @staticmethod
+    def _split_tags(tags: Optional[str]) -> List[str]:
+        return tags.split(", ") if tags else []
+
+    def _sync_maindata(self) -> bool:
+        """Bring the local torrent table up to date using the /sync/maindata rid cursor"""
+        response = self._make_request('GET', '/sync/maindata', params={"rid": self._rid})
+        if not response or response.status_code != 200:
+            return False
+        try:
+            data = response.json()
+        except ValueError:
+            return False
+
+        # A full update fills a fresh index that replaces the old one in one assignment,
+        # so lock-free owns() checks never see it half rebuilt
+        ownership = self._ownership
+        if data.get("full_update"):
+            self._torrent_table = {}
+            ownership = OwnershipIndex()
+        for torrent_hash, delta in (data.get("torrents") or {}).items():
+            torrent = self._torrent_table.setdefault(torrent_hash, {"hash": torrent_hash})
+            torrent.update(delta)
+            if "tags" in delta:
+                ownership.set([torrent_hash], self._split_tags(torrent.get("tags")))
+        for torrent_hash in data.get("torrents_removed") or []:
+            self._torrent_table.pop(torrent_hash, None)
+            self._files_cache.pop(torrent_hash, None)
+            ownership.remove([torrent_hash])
+        self._ownership = ownership
+        if data.get("full_update"):
+            for torrent_hash in set(self._files_cache) - set(self._torrent_table):
+                self._files_cache.pop(torrent_hash, None)
+        self._sync_tag_registry(data)
+
+        self._rid = data.get("rid", self._rid)
+        self._synced = True
+        return True
 
+    def _sync_tag_registry(self, data: Dict[str, Any]) -> None:
+        """Keep the tag registry current from the tags / tags_removed fields of a maindata delta"""
+        with self._tags_lock:
+            if data.get("full_update") and "tags" in data:
+                self._known_tags = set(data["tags"])
+                return
+            if self._known_tags is None:
+                return
+            self._known_tags.update(data.get("tags") or [])
+            self._known_tags.difference_update(data.get("tags_removed") or [])
+
+    def _get_torrent_table(self) -> Optional[List[Dict[str, Any]]]:
+        """Sync and return a copy of the torrent table, or None if it was never loaded"""
+        with self._sync_lock:
+            if not self._sync_maindata():
+                if not self._synced:
+                    return None
+                logger.warning("qBittorrent sync failed - serving last known torrent state")
+            return [dict(t) for t in self._torrent_table.values()]
 
     def get_torrents(self, user: User) -> List[Dict[str, Any]]:
         """Get torrents filtered by user permissions"""
-        response = self._make_request('GET', '/torrents/info')
-        if not response or response.status_code != 200:
-            return []
-
-        try:
-            torrents = response.json()
-        except:
+        torrents = self._get_torrent_table()
+        if torrents is None:
             return []
 
         filtered_torrents = []
         for torrent in torrents:
-            tags = torrent.get("tags", "").split(", ") if torrent.get("tags") else []
+            tags = self._split_tags(torrent.get("tags"))
             
             if LABEL not in tags or (user.id not in tags and user.role != "admin"):
                 continue
@@ -742,9 +1147,6 @@ class QBittorrentClient(TorrentClientInterface):
             if import_error:
                 candidates = get_candidates(hash_string)
 
-
-            # Fetch files for this torrent (for beets integration)
-            files = self._get_torrent_files(hash_string)
             filtered_torrents.append({
                 "id": hash_string,
                 "labels": tags,
@@ -755,7 +1157,6 @@ class QBittorrentClient(TorrentClientInterface):
                 "downloaded_ever": torrent.get("downloaded", 0),
                 "uploaded_ever": torrent.get("uploaded", 0),
                 "added_date": torrent.get("added_on", 0),
-                "files": files,
                 "use_beets_import": USE_BEETS_IMPORT,
                 "imported": imported,
                 "importError": import_error,
@@ -774,8 +1175,6 @@ class QBittorrentClient(TorrentClientInterface):
         if label is None:
             label = LABEL
 
-        torrent_url = self._get_jackett_magnet(torrent_url)
-
         user_tags = [label, user.id]
         if user.username:
             user_tags.append(f"username:{user.username}")
@@ -852,14 +1251,12 @@ class QBittorrentClient(TorrentClientInterface):
 
     def add_label_to_torrent(self, torrent_id: str, user: User, label: str) -> bool:
         """Add tag to torrent in qBittorrent"""
-        self._ensure_tags_exist([label])
-        
         tags_to_add = [label]
         if user:
             tags_to_add.append(user.id)
             if user.username:
                 tags_to_add.append(f"username:{user.username}")
-            self._ensure_tags_exist(tags_to_add)
+        self._ensure_tags_exist(tags_to_add)
 
         response = self._make_request(
             'POST', 
@@ -903,7 +1300,7 @@ class QBittorrentClient(TorrentClientInterface):
         return False
     def delete_old_torrents(self) -> None:
         """Delete old completed torrents"""
-        torrents = self.get_torrents(ADMIN_USER_DICT)
+        torrents = self.list_torrents(ADMIN_USER_DICT)
         torrents = [t for t in torrents if (
             LABEL in t.get("labels", []) and 
             BEETS_COMPLETE_LABEL in t.get("labels", []) and 
@@ -924,7 +1321,7 @@ class QBittorrentClient(TorrentClientInterface):
                 logger.info(f"DELETED: {torrent['name']}")
 
     def pause_stale_torrents(self) -> None:
-        torrents = self.get_torrents(ADMIN_USER_DICT)
+        torrents = self.list_torrents(ADMIN_USER_DICT)
         torrents = [t for t in torrents if (
             t.get("status") != "Stopped" and
             BEETS_COMPLETE_LABEL not in t.get("labels", [])
@@ -942,19 +1339,6 @@ class QBittorrentClient(TorrentClientInterface):
                 self.pause_torrent(str(torrent["id"]), user=ADMIN_USER_DICT)
                 logger.info(f"PAUSED STALE: {torrent['name']} (no activity for {int(days_since_activity)} days)")
 
-    def _get_jackett_magnet(self, url: str) -> str:
-        """Convert URL to magnet link if needed"""
-        try:
-            if url.startswith("magnet:"):
-                return url
-            response = requests.get(url, allow_redirects=False)
-            if response.status_code in [301, 302]:
-                return response.headers.get("Location", url)
-        except Exception as e:
-            logger.error(f"Error fetching magnet URL: {e}")
-            return url
-        return url
-
     def _map_torrent_status(self, state: str) -> str:
         """Map qBittorrent state to readable status"""
         status_map = {
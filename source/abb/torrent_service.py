@@ -1,41 +1,151 @@
+import asyncio
+import functools
+import threading
 import time
-from typing import Optional, List, Dict, Any
-from .models import User, TorrentClientType
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, List, Dict, Any
+from .models import BatchAction, User, TorrentClientType
 from .torrent import create_torrent_client, TorrentClientInterface
 from .constants import (
-    LABEL, DELETE_AFTER_DAYS, STRICTLY_DELETE_AFTER_DAYS, 
-    BEETS_COMPLETE_LABEL, BEETS_ERROR_LABEL
+    ADMIN_USER_DICT, LABEL, DELETE_AFTER_DAYS, STRICTLY_DELETE_AFTER_DAYS, 
+    BEETS_COMPLETE_LABEL, BEETS_ERROR_LABEL, TORRENT_REFRESH_INTERVAL, TORRENT_CLIENT_WORKERS,
+    SINGLE_FLIGHT_WAIT
 )
-from .audiobookbay import get_jackett_magnet
+from .magnets import get_magnet_resolver
+from .singleflight import SingleFlight
 from .utils import custom_logger
 
 logger = custom_logger(__name__)
 
+
+class TorrentSnapshot:
+    """Process-wide copy of the client's admin torrent listing.
+
+    A single background thread refreshes it every `interval` seconds; readers
+    always get the last completed listing, even while a refresh is in flight.
+    """
+
+    def __init__(self, fetch: Callable[[], List[Dict[str, Any]]], interval: float):
+        self._fetch = fetch
+        # Saved from the settings page this may arrive as a string
+        self.interval = max(1, int(interval or 1))
+        self.updated_at = 0.0
+        self._torrents: Optional[List[Dict[str, Any]]] = None
+        # Readers that need a refresh at the same time share one client fetch
+        self._flight = SingleFlight(SINGLE_FLIGHT_WAIT)
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="torrent-snapshot", daemon=True)
+        self._thread.start()
+        logger.info(f"Started torrent snapshot refresher ({self.interval}s interval)")
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def refresh(self) -> List[Dict[str, Any]]:
+        """Fetch a new listing from the client and publish it"""
+        return self._flight.do("torrents", self._refresh)
+
+    def _refresh(self) -> List[Dict[str, Any]]:
+        torrents = self._fetch()
+        self._torrents = torrents
+        self.updated_at = time.time()
+        return torrents
+
+    def request_refresh(self) -> None:
+        """Wake the refresher early, e.g. after a torrent was added or removed"""
+        if self.running:
+            self._wakeup.set()
+        else:
+            self.updated_at = 0.0
+
+    def get(self) -> List[Dict[str, Any]]:
+        torrents = self._torrents
+        if torrents is None:
+            return self.refresh()
+        # Without the refresher thread (e.g. scripts) fall back to refresh-on-read
+        if not self.running and time.time() - self.updated_at > self.interval:
+            return self.refresh()
+        return torrents
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.exception(f"Torrent snapshot refresh failed: {e}")
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+
 class TorrentService:
     """Service class to handle all torrent operations"""
 
     def __init__(self, client_type: TorrentClientType = TorrentClientType.transmission, **client_kwargs):
         self.client_type = client_type
         self.client: TorrentClientInterface = create_torrent_client(client_type, **client_kwargs)
+        self.snapshot = TorrentSnapshot(self._fetch_snapshot, TORRENT_REFRESH_INTERVAL)
+        self.client.torrent_source = self.snapshot.get
         logger.info(f"Initialized TorrentService with {client_type.value} client")
 
+    def _fetch_snapshot(self) -> List[Dict[str, Any]]:
+        return self.client.get_torrents(ADMIN_USER_DICT)
+
+    def start(self) -> None:
+        """Start the background snapshot refresher"""
+        self.snapshot.start()
+
+    def stop(self) -> None:
+        self.snapshot.stop()
+
     def get_torrents(self, user: User) -> List[Dict[str, Any]]:
-        """Get torrents for a user"""
+        """Get torrents for a user from the shared snapshot"""
         try:
-            return self.client.get_torrents(user)
+            return self.client.view_for_user(self.snapshot.get(), user)
         except Exception as e:
             logger.exception(f"Error getting torrents: {e}")
             return []
 
+    def get_torrent_files(self, torrent_id: str, user: User) -> Optional[List[Dict[str, Any]]]:
+        """Get the file list of a torrent, or None if the user can't see it.
+
+        Raises TorrentClientUnavailable when the client can't list the files.
+        """
+        if not self.client.has_access(user, torrent_id):
+            return None
+        return self.client.get_torrent_files(torrent_id)
+
+    def get_files_for_torrents(self, torrent_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Get file lists for several torrents concurrently (internal use, no access check)"""
+        try:
+            return self.client.get_files_for_torrents(torrent_ids)
+        except Exception as e:
+            logger.error(f"Error getting torrent files: {e}")
+            return {}
+
     def add_torrent(self, torrent_url: str, user: User, label: str = None, category: str = None) -> bool:
         """Add torrent from URL/magnet link. Category is optional (qBittorrent only)."""
         try:
             if label is None:
                 label = LABEL
 
-            # Convert to magnet if needed
-            torrent_url = get_jackett_magnet(torrent_url)
-            return self.client.add_torrent(torrent_url, user, label, category)
+            # Convert to magnet if needed - usually already prefetched while the results were shown
+            torrent_url = get_magnet_resolver().resolve(torrent_url)
+            return self._changed(self.client.add_torrent(torrent_url, user, label, category))
         except Exception as e:
             logger.error(f"Error adding torrent: {e}")
             return False
@@ -43,7 +153,7 @@ class TorrentService:
     def delete_torrent(self, torrent_id: str, user: User, delete_data: bool = True) -> bool:
         """Delete a torrent"""
         try:
-            return self.client.delete_torrent(torrent_id, user, delete_data)
+            return self._changed(self.client.delete_torrent(torrent_id, user, delete_data))
         except Exception as e:
             logger.error(f"Error deleting torrent {torrent_id}: {e}")
             return False
@@ -51,7 +161,7 @@ class TorrentService:
     def pause_torrent(self, torrent_id: str, user: User) -> bool:
         """Pause a torrent"""
         try:
-            return self.client.pause_torrent(torrent_id, user)
+            return self._changed(self.client.pause_torrent(torrent_id, user))
         except Exception as e:
             logger.error(f"Error pausing torrent {torrent_id}: {e}")
             return False
@@ -59,7 +169,7 @@ class TorrentService:
     def resume_torrent(self, torrent_id: str, user: User) -> bool:
         """Resume/play a torrent"""
         try:
-            return self.client.resume_torrent(torrent_id, user)
+            return self._changed(self.client.resume_torrent(torrent_id, user))
         except Exception as e:
             logger.error(f"Error resuming torrent {torrent_id}: {e}")
             return False
@@ -67,7 +177,7 @@ class TorrentService:
     def add_label_to_torrent(self, torrent_id: str, user: User, label: str) -> bool:
         """Add label to torrent"""
         try:
-            return self.client.add_label_to_torrent(torrent_id, user, label)
+            return self._changed(self.client.add_label_to_torrent(torrent_id, user, label))
         except Exception as e:
             logger.error(f"Error adding label to torrent {torrent_id}: {e}")
             return False
@@ -75,7 +185,7 @@ class TorrentService:
     def remove_label_from_torrent(self, torrent_id: str, user: User, label: str) -> bool:
         """Remove label from torrent"""
         try:
-            return self.client.remove_label_from_torrent(torrent_id, user, label)
+            return self._changed(self.client.remove_label_from_torrent(torrent_id, user, label))
         except Exception as e:
             logger.error(f"Error removing label from torrent {torrent_id}: {e}")
             return False
@@ -83,23 +193,41 @@ class TorrentService:
     def set_category(self, torrent_id: str, user: User, category: str) -> bool:
         """Set category for a torrent (qBittorrent only)"""
         try:
-            return self.client.set_category(torrent_id, user, category)
+            return self._changed(self.client.set_category(torrent_id, user, category))
         except Exception as e:
             logger.error(f"Error setting category for torrent {torrent_id}: {e}")
             return False
+
+    def batch_action(self, action: BatchAction, torrent_ids: List[str], user: User,
+                     delete_data: bool = True, category: str = None) -> Dict[str, List[str]]:
+        """Apply one action to many torrents"""
+        try:
+            result = self.client.batch_action(action, torrent_ids, user, delete_data, category)
+            self._changed(bool(result["applied"]))
+            return result
+        except Exception as e:
+            logger.error(f"Error running batch {action.value} on {len(torrent_ids)} torrents: {e}")
+            return {"applied": [], "failed": list(torrent_ids), "denied": []}
+
+    def _changed(self, success: bool) -> bool:
+        """Pass through a mutation result, refreshing the snapshot if it changed anything"""
+        if success:
+            self.snapshot.request_refresh()
+        return success
+
     def remove_label_from_torrent_with_hash(self, hash_string: str, user: User, label: str) -> bool:
         """Remove label from torrent by hash"""
         try:
             # For Transmission, find torrent by hash first
             if self.client_type == TorrentClientType.transmission:
-                torrents = self.client.get_torrents(user)
+                torrents = self.get_torrents(user)
                 matching_torrents = [t for t in torrents if t.get("hash_string") == hash_string]
                 if matching_torrents:
-                    return self.client.remove_label_from_torrent(str(matching_torrents[0]["id"]), user, label)
+                    return self._changed(self.client.remove_label_from_torrent(str(matching_torrents[0]["id"]), user, label))
                 return False
 
             # For other clients that might use hash directly as ID
-            return self.client.remove_label_from_torrent(hash_string, user, label)
+            return self._changed(self.client.remove_label_from_torrent(hash_string, user, label))
         except Exception as e:
             logger.exception(f"Error removing label from torrent with hash {hash_string}: {e}")
             return False
@@ -108,17 +236,78 @@ class TorrentService:
         """Delete old completed torrents"""
         try:
             self.client.delete_old_torrents()
+            self.snapshot.request_refresh()
         except Exception as e:
             logger.error(f"Error deleting old torrents: {e}")
 
     def pause_stale_torrents(self) -> None:
         try:
             self.client.pause_stale_torrents()
+            self.snapshot.request_refresh()
         except Exception as e:
             logger.error(f"Error pausing stale torrents: {e}")
 
+class AsyncTorrentService:
+    """Async variant of TorrentService for the FastAPI endpoints.
+
+    The torrent clients speak blocking HTTP, so their calls run on a dedicated,
+    bounded executor instead of Starlette's shared threadpool: a slow client can
+    then only delay other torrent calls, never searches or static pages.
+    Snapshot reads don't touch the client and are served straight from the loop.
+    """
+
+    def __init__(self, service: TorrentService, max_workers: int = TORRENT_CLIENT_WORKERS):
+        self.service = service
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="torrent-client")
+
+    async def _run(self, fn: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    async def get_torrents(self, user: User) -> List[Dict[str, Any]]:
+        if self.service.snapshot.updated_at and self.service.snapshot.running:
+            return self.service.get_torrents(user)
+        return await self._run(self.service.get_torrents, user)
+
+    async def get_torrent_files(self, torrent_id: str, user: User) -> Optional[List[Dict[str, Any]]]:
+        return await self._run(self.service.get_torrent_files, torrent_id, user)
+
+    async def get_files_for_torrents(self, torrent_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        return await self._run(self.service.get_files_for_torrents, torrent_ids)
+
+    async def add_torrent(self, torrent_url: str, user: User, label: str = None, category: str = None) -> bool:
+        return await self._run(self.service.add_torrent, torrent_url, user, label, category)
+
+    async def delete_torrent(self, torrent_id: str, user: User, delete_data: bool = True) -> bool:
+        return await self._run(self.service.delete_torrent, torrent_id, user, delete_data)
+
+    async def pause_torrent(self, torrent_id: str, user: User) -> bool:
+        return await self._run(self.service.pause_torrent, torrent_id, user)
+
+    async def resume_torrent(self, torrent_id: str, user: User) -> bool:
+        return await self._run(self.service.resume_torrent, torrent_id, user)
+
+    async def set_category(self, torrent_id: str, user: User, category: str) -> bool:
+        return await self._run(self.service.set_category, torrent_id, user, category)
+
+    async def remove_label_from_torrent_with_hash(self, hash_string: str, user: User, label: str) -> bool:
+        return await self._run(self.service.remove_label_from_torrent_with_hash, hash_string, user, label)
+
+    async def batch_action(self, action: BatchAction, torrent_ids: List[str], user: User,
+                           delete_data: bool = True, category: str = None) -> Dict[str, List[str]]:
+        return await self._run(self.service.batch_action, action, torrent_ids, user, delete_data, category)
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run any other blocking torrent work (autoimport, cleanup) on the torrent executor"""
+        return await self._run(fn, *args, **kwargs)
+
+
 # Global torrent service instance - will be initialized at startup
 torrent_service: Optional[TorrentService] = None
+async_torrent_service: Optional[AsyncTorrentService] = None
 
 def get_torrent_service() -> TorrentService:
     """Get the global torrent service instance"""
@@ -126,10 +315,17 @@ def get_torrent_service() -> TorrentService:
         raise RuntimeError("TorrentService not initialized. Call init_torrent_service() first.")
     return torrent_service
 
+def get_async_torrent_service() -> AsyncTorrentService:
+    """Get the global async torrent service instance"""
+    if async_torrent_service is None:
+        raise RuntimeError("TorrentService not initialized. Call init_torrent_service() first.")
+    return async_torrent_service
+
 def init_torrent_service(client_type: TorrentClientType = TorrentClientType.transmission, **client_kwargs) -> TorrentService:
     """Initialize the global torrent service instance"""
-    global torrent_service
+    global torrent_service, async_torrent_service
     torrent_service = TorrentService(client_type, **client_kwargs)
+    async_torrent_service = AsyncTorrentService(torrent_service)
     return torrent_service
 
 # Convenience functions that use the global service
@@ -137,6 +333,14 @@ def get_torrents(user: User) -> List[Dict[str, Any]]:
     """Get torrents for a user"""
     return get_torrent_service().get_torrents(user)
 
+def get_torrent_files(torrent_id: str, user: User) -> Optional[List[Dict[str, Any]]]:
+    """Get the file list of a torrent, or None if the user can't see it"""
+    return get_torrent_service().get_torrent_files(torrent_id, user)
+
+def get_files_for_torrents(torrent_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Get file lists for several torrents concurrently"""
+    return get_torrent_service().get_files_for_torrents(torrent_ids)
+
 def add_torrent(torrent_url: str, user: User, label: str = None, category: str = None) -> bool:
     """Add torrent from URL/magnet link"""
     return get_torrent_service().add_torrent(torrent_url, user, label, category)
@@ -165,6 +369,11 @@ def remove_label_from_torrent_with_hash(hash_string: str, user: User, label: str
     """Remove label from torrent by hash"""
     return get_torrent_service().remove_label_from_torrent_with_hash(hash_string, user, label)
 
+def batch_action(action: BatchAction, torrent_ids: List[str], user: User,
+                 delete_data: bool = True, category: str = None) -> Dict[str, List[str]]:
+    """Apply one action to many torrents"""
+    return get_torrent_service().batch_action(action, torrent_ids, user, delete_data, category)
+
 def delete_old_torrents() -> None:
     """Delete old completed torrents"""
     get_torrent_service().delete_old_torrents()
@@ -0,0 +1,315 @@
+"""
+Shared HTTP transport for the upstream backends (Jackett, the torrent clients, Goodreads).
+
+Every call gets connect/read timeouts and an overall deadline, transient failures
+are retried a bounded number of times with jittered backoff, and a per-backend
+circuit breaker fails fast while a backend keeps failing instead of tying up a
+worker on every request.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from .config_db import get_effective_config
+from .constants import (
+    UPSTREAM_RETRIES, UPSTREAM_BACKOFF, UPSTREAM_BREAKER_THRESHOLD, UPSTREAM_BREAKER_RESET
+)
+from .utils import custom_logger
+
+logger = custom_logger(__name__)
+
+# Methods that are safe to send twice; anything else is only retried if it never connected
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+RETRY_STATUSES = {502, 503, 504}
+# Backends whose read timeouts aren't retried: a Jackett search that used up its read
+# timeout will most likely do so again, and the user is better off with an error now
+NO_READ_TIMEOUT_RETRY = {"jackett"}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of calling a backend whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: opens after `threshold` failures, lets one probe through after `reset_after` seconds"""
+
+    def __init__(self, name: str, threshold: int, reset_after: float):
+        self.name = name
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_after:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.reset_after:
+                return False
+            # Cool-down over - let a single request find out whether the backend is back
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"Upstream {self.name} recovered, closing circuit")
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def release_probe(self) -> None:
+        """Give back the half-open probe after a call that was interrupted rather than failed"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._opened_at is not None or self._failures >= self.threshold:
+                if self._opened_at is None:
+                    logger.warning(f"Upstream {self.name} failed {self._failures} times in a row, opening circuit")
+                self._opened_at = time.monotonic()
+
+
+class Backend:
+    """Timeouts, retry policy and breaker for one upstream service"""
+
+    def __init__(self, name: str, connect_timeout: float, read_timeout: float,
+                 retries: int = UPSTREAM_RETRIES, backoff: float = UPSTREAM_BACKOFF,
+                 retry_read_timeouts: bool = True):
+        self.name = name
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.retry_read_timeouts = retry_read_timeouts
+        # Worst case for one call: every attempt times out, plus the sleeps between them
+        reads = retries + 1 if retry_read_timeouts else 1
+        self.deadline = connect_timeout * (retries + 1) + read_timeout * reads + backoff * (2 ** retries)
+        self.breaker = CircuitBreaker(name, UPSTREAM_BREAKER_THRESHOLD, UPSTREAM_BREAKER_RESET)
+
+    def sleep_before_retry(self, attempt: int, remaining: float) -> bool:
+        """Full-jitter exponential backoff; False if there is no time left for another attempt"""
+        delay = random.uniform(0, self.backoff * (2 ** attempt))
+        if delay >= remaining:
+            return False
+        time.sleep(delay)
+        return True
+
+    def timeout(self, remaining: float):
+        return (min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+
+
+_backends: Dict[str, Backend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name: str) -> Backend:
+    """Backend settings for name ("jackett", "torrent" or "goodreads"), read from config on first use"""
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            backend = Backend(
+                name,
+                connect_timeout=float(get_effective_config(f"{name}_connect_timeout") or 5),
+                read_timeout=float(get_effective_config(f"{name}_read_timeout") or 30),
+                retry_read_timeouts=name not in NO_READ_TIMEOUT_RETRY,
+            )
+            _backends[name] = backend
+        return backend
+
+
+def reset_backends() -> None:
+    """Forget cached backend settings so the next call picks up changed config"""
+    with _backends_lock:
+        _backends.clear()
+
+
+def _end_attempt(breaker: CircuitBreaker, error: BaseException) -> None:
+    # Errors other than connect/read failures (a broken chunked body, too many redirects,
+    # undecodable content) still count, and a cancelled or interrupted call must at
+    # least hand back the half-open probe, or the breaker stays shut for good
+    if isinstance(error, Exception):
+        breaker.record_failure()
+    else:
+        breaker.release_probe()
+
+
+def _never_sent(error: requests.exceptions.RequestException) -> bool:
+    """Whether the request failed before reaching the server (refused, unresolvable, connect timeout)"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    # requests wraps urllib3's MaxRetryError, whose reason is the underlying failure
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class UpstreamSession(requests.Session):
+    """requests.Session bound to a backend: default timeouts, deadline, retries and circuit breaking"""
+
+    def __init__(self, backend: str, pool_maxsize: int = 10):
+        super().__init__()
+        self.backend_name = backend
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+
+    @property
+    def backend(self) -> Backend:
+        return get_backend(self.backend_name)
+
+    def request(self, method, url, *args, deadline: Optional[float] = None, **kwargs):
+        backend = self.backend
+        breaker = backend.breaker
+        if not breaker.allow():
+            raise CircuitOpenError(f"{backend.name} circuit is open, not calling {url}")
+
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        explicit_timeout = kwargs.pop("timeout", None)
+        expires = time.monotonic() + (deadline or backend.deadline)
+        attempt = 0
+        while True:
+            remaining = expires - time.monotonic()
+            timeout = explicit_timeout or backend.timeout(remaining)
+            try:
+                response = super().request(method, url, *args, timeout=timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                # A refused or timed-out connect never reached the server, so any method may be resent
+                if _never_sent(e):
+                    retryable = True
+                elif isinstance(e, requests.exceptions.ReadTimeout):
+                    retryable = idempotent and backend.retry_read_timeouts
+                else:
+                    retryable = idempotent
+                if not retryable or attempt >= backend.retries or \
+                        not backend.sleep_before_retry(attempt, expires - time.monotonic()):
+                    breaker.record_failure()
+                    raise
+                logger.debug(f"{backend.name} {method} {url} failed ({e}), retrying")
+                attempt += 1
+                continue
+            except BaseException as e:
+                _end_attempt(breaker, e)
+                raise
+
+            if idempotent and response.status_code in RETRY_STATUSES and attempt < backend.retries \
+                    and backend.sleep_before_retry(attempt, expires - time.monotonic()):
+                logger.debug(f"{backend.name} {method} {url} returned {response.status_code}, retrying")
+                response.close()
+                attempt += 1
+                continue
+
+            # Any response means the backend is reachable. Error statuses are left to the
+            # caller: one broken Jackett indexer answering 500 mustn't open the circuit for all.
+            breaker.record_success()
+            return response
+
+
+_sessions: Dict[str, UpstreamSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(backend: str) -> UpstreamSession:
+    """Shared pooled session for callers that don't need their own cookies or auth"""
+    with _sessions_lock:
+        session = _sessions.get(backend)
+        if session is None:
+            session = UpstreamSession(backend)
+            _sessions[backend] = session
+        return session
+
+
+# Shared pooled client for the async endpoints, created on first use
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(limits=httpx.Limits(max_connections=20, max_keepalive_connections=10))
+    return _async_client
+
+
+async def close_async_client() -> None:
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+async def _backoff(breaker: CircuitBreaker, delay: float) -> None:
+    try:
+        await asyncio.sleep(delay)
+    except asyncio.CancelledError:
+        breaker.release_probe()
+        raise
+
+
+async def async_request(backend_name: str, method: str, url: str, **kwargs) -> httpx.Response:
+    """UpstreamSession.request for the event loop, sharing the backend's breaker"""
+    backend = get_backend(backend_name)
+    breaker = backend.breaker
+    if not breaker.allow():
+        raise CircuitOpenError(f"{backend.name} circuit is open, not calling {url}")
+
+    idempotent = method.upper() in IDEMPOTENT_METHODS
+    loop = asyncio.get_running_loop()
+    expires = loop.time() + (kwargs.pop("deadline", None) or backend.deadline)
+    attempt = 0
+    while True:
+        remaining = max(expires - loop.time(), 0.001)
+        connect, read = backend.timeout(remaining)
+        timeout = httpx.Timeout(read, connect=connect)
+        try:
+            response = await get_async_client().request(method, url, timeout=timeout, **kwargs)
+        except httpx.TransportError as e:
+            if isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)):
+                retryable = True
+            elif isinstance(e, httpx.ReadTimeout):
+                retryable = idempotent and backend.retry_read_timeouts
+            else:
+                retryable = idempotent
+            delay = random.uniform(0, backend.backoff * (2 ** attempt))
+            if not retryable or attempt >= backend.retries or delay >= expires - loop.time():
+                breaker.record_failure()
+                raise
+            logger.debug(f"{backend.name} {method} {url} failed ({e}), retrying")
+            await _backoff(breaker, delay)
+            attempt += 1
+            continue
+        except BaseException as e:
+            _end_attempt(breaker, e)
+            raise
+
+        if idempotent and response.status_code in RETRY_STATUSES and attempt < backend.retries:
+            delay = random.uniform(0, backend.backoff * (2 ** attempt))
+            if delay < expires - loop.time():
+                logger.debug(f"{backend.name} {method} {url} returned {response.status_code}, retrying")
+                await response.aclose()
+                await _backoff(breaker, delay)
+                attempt += 1
+                continue
+
+        breaker.record_success()
+        return response
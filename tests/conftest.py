@@ -0,0 +1,28 @@
+"""
+Shared fixtures for the tests.
+"""
+
+import pytest
+
+
+@pytest.fixture
+def canned_requests(monkeypatch):
+    """Answer a torrent client's _make_request calls from a queue instead of the network.
+
+    canned_requests(client, wrap) gives client a `responses` list to queue answers on and a
+    `requests` list recording the (args, kwargs) of each call. Answers other than None are
+    passed through wrap first, e.g. to turn canned JSON into a response object.
+    """
+    def install(client, wrap=None):
+        client.responses = []
+        client.requests = []
+
+        def fake_request(*args, **kwargs):
+            client.requests.append((args, kwargs))
+            response = client.responses.pop(0)
+            return wrap(response) if wrap is not None and response is not None else response
+
+        monkeypatch.setattr(client, "_make_request", fake_request)
+        return client
+
+    return install
@@ -0,0 +1,129 @@
+"""
+Tests for incremental Goodreads shelf fetching (conditional requests and the date_added cursor).
+"""
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from abb import goodreads
+from abb.goodreads import fetch_goodreads_shelf
+
+START = datetime(2024, 1, 31, 12, 0, tzinfo=timezone.utc)
+
+
+def added(days_ago):
+    return START - timedelta(days=days_ago)
+
+
+def rss(*books):
+    """A shelf page; books are (book_id, added) pairs, newest first like the real feed"""
+    items = "".join(
+        f"<item><title>Book {book_id}</title><book_id>{book_id}</book_id>"
+        f"<author_name>Author</author_name><user_date_added>{format_datetime(when)}</user_date_added></item>"
+        for book_id, when in books
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Shelf</title>{items}</channel></rss>'.encode()
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """Answers GETs from `session.responses` in order and records (page, headers) in `session.calls`"""
+    class FakeSession:
+        def __init__(self):
+            self.responses = []
+            self.calls = []
+
+        def get(self, url, headers=None):
+            self.calls.append((int(url.rsplit("page=", 1)[1]), headers or {}))
+            response = self.responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+    fake = FakeSession()
+    monkeypatch.setattr(goodreads, "get_session", lambda name: fake)
+    return fake
+
+
+def ids(books):
+    return [book["book_id"] for book in books]
+
+
+def test_first_fetch_returns_everything_and_sets_the_cursor(session):
+    session.responses.append(FakeResponse(
+        content=rss(("2", added(1)), ("1", added(5))),
+        headers={"ETag": '"v1"', "Last-Modified": "Wed, 31 Jan 2024 12:00:00 GMT"},
+    ))
+
+    books, state = fetch_goodreads_shelf("user", "to-read")
+
+    assert ids(books) == ["2", "1"]
+    assert state["cursor"] == added(1).replace(tzinfo=None).isoformat()
+    assert state["etag"] == '"v1"'
+    assert state["last_modified"] == "Wed, 31 Jan 2024 12:00:00 GMT"
+    # Nothing to be conditional on yet
+    assert session.calls[0][1] == {}
+
+
+def test_unchanged_shelf_answers_304(session):
+    state = {"cursor": added(1).replace(tzinfo=None).isoformat(), "etag": '"v1"', "last_modified": "then"}
+    session.responses.append(FakeResponse(status_code=304))
+
+    books, new_state = fetch_goodreads_shelf("user", "to-read", sync_state=state)
+
+    assert books == []
+    assert new_state == state
+    assert session.calls[0][1] == {"If-None-Match": '"v1"', "If-Modified-Since": "then"}
+
+
+def test_pagination_stops_at_the_cursor(session):
+    state = {"cursor": added(5).replace(tzinfo=None).isoformat()}
+    session.responses.append(FakeResponse(content=rss(("3", added(1)), ("2", added(6)), ("1", added(9)))))
+
+    books, new_state = fetch_goodreads_shelf("user", "to-read", sync_state=state)
+
+    assert ids(books) == ["3"]
+    assert len(session.calls) == 1
+    assert new_state["cursor"] == added(1).replace(tzinfo=None).isoformat()
+
+
+def test_cursor_stays_put_when_a_later_page_fails(session):
+    """Books on the pages that weren't fetched are older than the newest one; moving the cursor would lose them"""
+    full_page = rss(*((str(1000 + i), added(1 + i / 1000)) for i in range(200)))
+    state = {"cursor": added(30).replace(tzinfo=None).isoformat()}
+    session.responses.append(FakeResponse(content=full_page))
+    session.responses.append(ConnectionError("reset"))
+
+    books, new_state = fetch_goodreads_shelf("user", "to-read", sync_state=state)
+
+    assert len(books) == 200
+    assert [page for page, _ in session.calls] == [1, 2]
+    assert new_state == state
+
+
+def test_cursor_stays_put_on_server_error(session):
+    state = {"cursor": added(5).replace(tzinfo=None).isoformat()}
+    session.responses.append(FakeResponse(status_code=503))
+
+    books, new_state = fetch_goodreads_shelf("user", "to-read", sync_state=state)
+
+    assert books == []
+    assert new_state == state
+
+
+def test_empty_shelf_completes_without_a_cursor(session):
+    session.responses.append(FakeResponse(content=rss()))
+
+    books, state = fetch_goodreads_shelf("user", "to-read")
+
+    assert books == []
+    assert "cursor" not in state
@@ -28,7 +28,15 @@ def test_all_modules_import():
         "abb.config_db",
         "abb.utils",
         "abb.db",
+        "abb.singleflight",
+        "abb.pipeline",
+        "abb.scoring",
+        "abb.search_index",
+        "abb.upstream",
         "abb.audiobookbay",
+        "abb.results",
+        "abb.matching",
+        "abb.magnets",
         "abb.torrent",
         "abb.torrent_service",
         "abb.beetsapi",
@@ -0,0 +1,143 @@
+"""
+Tests for QBittorrentClient's local torrent table kept current through /sync/maindata.
+"""
+
+import pytest
+
+from abb.constants import LABEL
+from abb.torrent import QBittorrentClient
+
+
+class FakeResponse:
+    def __init__(self, data, status_code=200):
+        self._data = data
+        self.status_code = status_code
+
+    def json(self):
+        return self._data
+
+
+def torrent(name, tags, **fields):
+    return dict({"name": name, "tags": ", ".join(tags), "state": "downloading", "progress": 0.5}, **fields)
+
+
+@pytest.fixture
+def client(canned_requests):
+    """A client whose maindata calls are answered from `client.responses`"""
+    return canned_requests(QBittorrentClient(url="http://qbittorrent.invalid", username="u", password="p"), FakeResponse)
+
+
+def rids(client):
+    """The rid sent with each maindata request"""
+    assert all(args == ("GET", "/sync/maindata") for args, _ in client.requests)
+    return [kwargs["params"]["rid"] for _, kwargs in client.requests]
+
+
+def table(client):
+    return {t["hash"]: t for t in client._get_torrent_table()}
+
+
+def test_rid_cursor_advances_between_syncs(client):
+    client.responses.append({"rid": 1, "full_update": True, "torrents": {"h1": torrent("One", [LABEL, "alice"])}})
+    client.responses.append({"rid": 2, "torrents": {}})
+    client.responses.append({"rid": 3})
+
+    for _ in range(3):
+        client._get_torrent_table()
+    assert rids(client) == [0, 1, 2]
+
+
+def test_partial_deltas_patch_existing_torrents(client):
+    client.responses.append({"rid": 1, "full_update": True, "torrents": {"h1": torrent("One", [LABEL, "alice"])}})
+    client._get_torrent_table()
+
+    # Deltas only carry the fields that changed
+    client.responses.append({"rid": 2, "torrents": {"h1": {"progress": 0.9}, "h2": torrent("Two", [LABEL, "bob"])}})
+    torrents = table(client)
+    assert torrents["h1"]["progress"] == 0.9
+    assert torrents["h1"]["name"] == "One"
+    assert torrents["h2"]["name"] == "Two"
+
+
+def test_removed_torrents_leave_table_files_cache_and_ownership(client):
+    client.responses.append({
+        "rid": 1, "full_update": True,
+        "torrents": {"h1": torrent("One", [LABEL, "alice"]), "h2": torrent("Two", [LABEL, "bob"])},
+    })
+    client._get_torrent_table()
+    client._files_cache["h2"] = [{"name": "file.mp3"}]
+    assert client._ownership.owns("bob", "h2")
+
+    client.responses.append({"rid": 2, "torrents_removed": ["h2"]})
+    assert list(table(client)) == ["h1"]
+    assert "h2" not in client._files_cache
+    assert not client._ownership.owns("bob", "h2")
+
+
+def test_full_update_replaces_the_table(client):
+    """The server may answer any rid with a full update; stale local torrents must go"""
+    client.responses.append({
+        "rid": 1, "full_update": True,
+        "torrents": {"h1": torrent("One", [LABEL, "alice"]), "h2": torrent("Two", [LABEL, "bob"])},
+    })
+    client._get_torrent_table()
+    client._files_cache["h2"] = [{"name": "file.mp3"}]
+
+    client.responses.append({"rid": 5, "full_update": True, "torrents": {"h1": torrent("One", [LABEL, "alice"])}})
+    assert list(table(client)) == ["h1"]
+    assert "h2" not in client._files_cache
+    assert not client._ownership.owns("bob", "h2")
+    assert client._rid == 5
+
+
+def test_tag_changes_update_ownership(client):
+    client.responses.append({"rid": 1, "full_update": True, "torrents": {"h1": torrent("One", [LABEL, "alice"])}})
+    client._get_torrent_table()
+
+    client.responses.append({"rid": 2, "torrents": {"h1": {"tags": f"{LABEL}, bob"}}})
+    client._get_torrent_table()
+    assert client._ownership.owns("bob", "h1")
+    assert not client._ownership.owns("alice", "h1")
+
+
+def test_tag_registry_follows_deltas(client):
+    client.responses.append({"rid": 1, "full_update": True, "tags": [LABEL, "alice"], "torrents": {}})
+    client._get_torrent_table()
+    client.responses.append({"rid": 2, "tags": ["bob"], "tags_removed": ["alice"]})
+    client._get_torrent_table()
+    assert client._known_tags == {LABEL, "bob"}
+
+
+def test_failed_sync_keeps_cursor_and_last_state(client):
+    client.responses.append({"rid": 1, "full_update": True, "torrents": {"h1": torrent("One", [LABEL, "alice"])}})
+    client._get_torrent_table()
+
+    client.responses.append(None)
+    assert list(table(client)) == ["h1"]
+    assert client._rid == 1
+
+
+def test_login_resets_the_cursor(client, monkeypatch):
+    """A new session has no sync history on the server, so the next sync starts from rid 0"""
+    client._rid = 7
+
+    class LoginSession:
+        def post(self, url, **kwargs):
+            return type("Response", (), {"status_code": 200, "text": "Ok."})()
+
+    monkeypatch.setattr(client, "session", LoginSession())
+    assert client._login()
+    assert client._rid == 0
+
+
+def test_full_update_swaps_the_ownership_index_in_whole(client):
+    """Access checks running during a full update must keep seeing the previous, complete index"""
+    client.responses.append({"rid": 1, "full_update": True, "torrents": {"h1": torrent("One", [LABEL, "alice"])}})
+    client._get_torrent_table()
+    previous = client._ownership
+
+    client.responses.append({"rid": 2, "full_update": True, "torrents": {"h1": torrent("One", [LABEL, "alice"])}})
+    client._get_torrent_table()
+    assert client._ownership is not previous
+    assert previous.owns("alice", "h1")
+    assert client._ownership.owns("alice", "h1")
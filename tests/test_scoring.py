@@ -0,0 +1,118 @@
+"""
+Tests for Goodreads match scoring (abb.scoring) around the MATCH_MIN_CONFIDENCE threshold.
+"""
+
+import pytest
+
+from abb.scoring import OTHER_AUTHOR_PENALTY, best_match, score_results, strip_series
+
+MB = 1024 * 1024
+# Default of MATCH_MIN_CONFIDENCE; not read from constants so the environment can't move it
+THRESHOLD = 0.6
+EXCLUDED = ["abridged", "sample", "german", "ebook", "epub"]
+
+
+def result(title, seeders=30, size=500 * MB):
+    return {"Title": title, "Seeders": seeders, "Peers": seeders + 2, "Size": size}
+
+
+BOOK = {"title": "Abaddon's Gate (The Expanse, #3)", "author": "James S.A. Corey"}
+
+
+def test_right_release_clears_the_threshold():
+    results = [result("James S. A. Corey - Abaddon's Gate (Unabridged)")]
+    match, confidence = best_match(BOOK, results, EXCLUDED)
+    assert match is results[0]
+    assert confidence >= THRESHOLD
+
+
+def test_other_book_by_the_author_stays_below_the_threshold():
+    results = [result("James S. A. Corey - Leviathan Wakes (The Expanse 1)", seeders=200)]
+    _, confidence = best_match(BOOK, results, EXCLUDED)
+    assert confidence < THRESHOLD
+
+
+def test_same_title_by_another_author_stays_below_the_threshold():
+    """Same-titled books by other authors are common; crediting someone else isn't the same as naming nobody"""
+    book = {"title": "Gone", "author": "Michael Grant"}
+    other_author = [result("Lisa Gardner - Gone")]
+    _, confidence = best_match(book, other_author, EXCLUDED)
+    assert confidence < THRESHOLD
+
+    for title in ("Gone by Lisa Gardner", "Gone - Lisa Gardner [M4B]"):
+        assert best_match(book, [result(title)], EXCLUDED)[1] < THRESHOLD
+
+
+def test_release_without_an_author_is_not_treated_as_another_author():
+    book = {"title": "Gone", "author": "Michael Grant"}
+    (anonymous,) = score_results(book, [result("Gone (Unabridged)")], EXCLUDED)
+    (other_author,) = score_results(book, [result("Lisa Gardner - Gone")], EXCLUDED)
+    assert anonymous - other_author >= OTHER_AUTHOR_PENALTY - 0.01
+
+
+def test_narrator_alongside_the_author_is_not_another_author():
+    book = {"title": "The Hobbit", "author": "J.R.R. Tolkien"}
+    results = [result("J.R.R. Tolkien - The Hobbit (Unabridged) read by Andy Serkis")]
+    assert best_match(book, results, EXCLUDED)[1] >= THRESHOLD
+
+
+def test_right_release_beats_a_better_seeded_wrong_one():
+    results = [
+        result("James S. A. Corey - Caliban's War", seeders=200),
+        result("James S. A. Corey - Abaddon's Gate", seeders=5),
+    ]
+    match, _ = best_match(BOOK, results, EXCLUDED)
+    assert match is results[1]
+
+
+def test_excluded_keyword_drops_below_the_threshold():
+    book = {"title": "The Hobbit", "author": "J.R.R. Tolkien"}
+    results = [result("J.R.R. Tolkien - The Hobbit (Abridged)", seeders=80)]
+    _, confidence = best_match(book, results, EXCLUDED)
+    assert confidence < THRESHOLD
+    # Without the exclusion list the same release would be accepted
+    _, unpenalized = best_match(book, results, [])
+    assert unpenalized >= THRESHOLD
+
+
+def test_excluded_keyword_in_the_book_title_is_not_penalized():
+    book = {"title": "The Sample Space", "author": "Jane Doe"}
+    results = [result("Jane Doe - The Sample Space (Unabridged)")]
+    assert score_results(book, results, EXCLUDED) == score_results(book, results, [])
+
+
+def test_tiny_release_loses_to_full_size_one():
+    book = {"title": "Atomic Habits", "author": "James Clear"}
+    results = [
+        result("James Clear - Atomic Habits", seeders=40, size=8 * MB),
+        result("James Clear - Atomic Habits", seeders=5, size=180 * MB),
+    ]
+    match, _ = best_match(book, results, EXCLUDED)
+    assert match is results[1]
+
+
+def test_ties_keep_the_earlier_result():
+    book = {"title": "Dune", "author": "Frank Herbert"}
+    results = [result("Frank Herbert - Dune"), result("Frank Herbert - Dune")]
+    match, _ = best_match(book, results, EXCLUDED)
+    assert match is results[0]
+
+
+def test_no_results():
+    assert best_match(BOOK, [], EXCLUDED) == (None, 0.0)
+    assert score_results(BOOK, []) == []
+
+
+def test_confidences_stay_in_range():
+    results = [result("James S. A. Corey - Abaddon's Gate Abridged Sample German ebook epub", seeders=0, size=1)]
+    assert all(0.0 <= confidence <= 1.0 for confidence in score_results(BOOK, results, EXCLUDED))
+
+
+@pytest.mark.parametrize("title, expected", [
+    ("Abaddon's Gate (The Expanse, #3)", "Abaddon's Gate"),
+    ("Small Gods (Discworld #13)", "Small Gods"),
+    ("Sapiens: A Brief History of Humankind", "Sapiens"),
+    ("Catch-22", "Catch-22"),
+])
+def test_strip_series(title, expected):
+    assert strip_series(title) == expected
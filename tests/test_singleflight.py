@@ -0,0 +1,158 @@
+"""
+Tests for in-flight call coalescing (abb.singleflight).
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from abb.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def _run_concurrently(flight, key, fn, callers=5):
+    """Call flight.do from several threads at once; returns (results, errors)"""
+    results, errors = [], []
+    barrier = threading.Barrier(callers)
+
+    def call():
+        barrier.wait()
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results, errors
+
+
+def test_concurrent_callers_share_one_call():
+    """Callers arriving while the leader runs get its result without calling again"""
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return ["result"]
+
+    results, errors = _run_concurrently(SingleFlight(wait_timeout=5), "key", fetch)
+
+    assert errors == []
+    assert len(calls) == 1
+    assert len(results) == 5
+    # Everyone gets the very same object
+    assert all(result is results[0] for result in results)
+
+
+def test_leader_error_reaches_every_follower():
+    """An exception from the shared call is raised in every waiting caller"""
+    calls = []
+
+    def fail():
+        calls.append(1)
+        time.sleep(0.2)
+        raise ValueError("upstream down")
+
+    results, errors = _run_concurrently(SingleFlight(wait_timeout=5), "key", fail)
+
+    assert results == []
+    assert len(calls) == 1
+    assert len(errors) == 5
+    assert all(isinstance(error, ValueError) for error in errors)
+
+
+def test_different_keys_are_not_coalesced():
+    flight = SingleFlight(wait_timeout=5)
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+
+
+def test_finished_call_is_not_reused():
+    """Only in-flight calls are shared; a later call runs again"""
+    flight = SingleFlight(wait_timeout=5)
+    counter = iter(range(10))
+    assert flight.do("key", lambda: next(counter)) == 0
+    assert flight.do("key", lambda: next(counter)) == 1
+
+
+def test_follower_calls_itself_after_wait_timeout():
+    """A hung leader doesn't stall followers beyond wait_timeout"""
+    flight = SingleFlight(wait_timeout=0.1)
+    release = threading.Event()
+    leader_started = threading.Event()
+
+    def slow():
+        leader_started.set()
+        release.wait(5)
+        return "leader"
+
+    leader = threading.Thread(target=flight.do, args=("key", slow))
+    leader.start()
+    leader_started.wait(5)
+    try:
+        assert flight.do("key", lambda: "own call") == "own call"
+    finally:
+        release.set()
+        leader.join(5)
+
+
+def test_async_concurrent_callers_share_one_call():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return ["result"]
+
+    async def main():
+        flight = AsyncSingleFlight(wait_timeout=5)
+        return await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+
+    results = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_async_leader_error_reaches_followers():
+    async def fail():
+        await asyncio.sleep(0.05)
+        raise ValueError("upstream down")
+
+    async def main():
+        flight = AsyncSingleFlight(wait_timeout=5)
+        return await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert len(results) == 3
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_async_followers_call_again_when_leader_is_cancelled():
+    """A cancelled leader (client went away) must not fail or hang the followers"""
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "result"
+
+    async def main():
+        flight = AsyncSingleFlight(wait_timeout=5)
+        leader = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == "result"
+    assert len(calls) == 2
@@ -0,0 +1,70 @@
+"""
+Tests that a torrent client failing to list files surfaces as an error instead of an empty list.
+"""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from abb import main
+from abb.constants import ADMIN_USER_DICT
+from abb.torrent import QBittorrentClient, TorrentClientUnavailable, TransmissionClient
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+def test_qbittorrent_unreachable_raises(monkeypatch):
+    client = QBittorrentClient(url="http://qbittorrent.invalid", username="u", password="p")
+    monkeypatch.setattr(client, "_make_request", lambda method, endpoint, **kwargs: None)
+    with pytest.raises(TorrentClientUnavailable):
+        client.get_torrent_files("h1")
+
+
+def test_qbittorrent_error_status_raises(monkeypatch):
+    client = QBittorrentClient(url="http://qbittorrent.invalid", username="u", password="p")
+    monkeypatch.setattr(client, "_make_request", lambda method, endpoint, **kwargs: FakeResponse(500))
+    with pytest.raises(TorrentClientUnavailable):
+        client.get_torrent_files("h1")
+
+
+def test_qbittorrent_torrent_without_files_is_still_an_empty_list(monkeypatch):
+    client = QBittorrentClient(url="http://qbittorrent.invalid", username="u", password="p")
+    monkeypatch.setattr(client, "_make_request", lambda method, endpoint, **kwargs: FakeResponse(200, []))
+    assert client.get_torrent_files("h1") == []
+
+
+def test_transmission_unreachable_raises(monkeypatch):
+    client = TransmissionClient(url="http://transmission.invalid/rpc", username="u", password="p")
+    monkeypatch.setattr(client, "_make_request", lambda payload: None)
+    with pytest.raises(TorrentClientUnavailable):
+        client.get_torrent_files("1")
+
+
+def test_files_endpoint_answers_502_when_the_client_is_down(monkeypatch):
+    class DownService:
+        async def get_torrent_files(self, torrent_id, user):
+            raise TorrentClientUnavailable("connection refused")
+
+    monkeypatch.setattr(main, "get_async_torrent_service", lambda: DownService())
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(main.torrent_files_endpoint("1", ADMIN_USER_DICT))
+    assert error.value.status_code == 502
+
+
+def test_files_endpoint_answers_404_for_hidden_torrents(monkeypatch):
+    class NoAccessService:
+        async def get_torrent_files(self, torrent_id, user):
+            return None
+
+    monkeypatch.setattr(main, "get_async_torrent_service", lambda: NoAccessService())
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(main.torrent_files_endpoint("1", ADMIN_USER_DICT))
+    assert error.value.status_code == 404
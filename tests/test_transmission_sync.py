@@ -0,0 +1,130 @@
+"""
+Tests for TransmissionClient's local torrent table and its recently-active delta merge.
+"""
+
+import time
+
+import pytest
+
+from abb.constants import LABEL
+from abb.models import User
+from abb.torrent import TransmissionClient
+
+FIELDS = TransmissionClient.LIST_FIELDS
+
+
+def row(torrent_id, name, labels, status=4):
+    values = {
+        "id": torrent_id, "name": name, "status": status, "labels": labels, "totalSize": 1000,
+        "percentDone": 0.5, "downloadedEver": 500, "uploadedEver": 0, "addedDate": torrent_id,
+        "activityDate": 0, "uploadRatio": 0.0, "eta": 60, "hashString": f"hash{torrent_id}",
+    }
+    return [values[field] for field in FIELDS]
+
+
+def table(*rows, removed=None):
+    arguments = {"torrents": [FIELDS] + list(rows)}
+    if removed is not None:
+        arguments["removed"] = removed
+    return {"result": "success", "arguments": arguments}
+
+
+@pytest.fixture
+def client(canned_requests):
+    """A client whose RPCs are answered from `client.responses`"""
+    return canned_requests(TransmissionClient(url="http://transmission.invalid/rpc", username="u", password="p"))
+
+
+def arguments(client, call):
+    """The RPC arguments sent in the call-th request"""
+    (payload,), _ = client.requests[call]
+    return payload["arguments"]
+
+
+def names(client):
+    return sorted(torrent["name"] for torrent in client._get_torrent_table())
+
+
+def test_first_sync_is_a_full_listing(client):
+    client.responses.append(table(row(1, "One", [LABEL, "alice"]), row(2, "Two", [LABEL, "bob"])))
+
+    assert names(client) == ["One", "Two"]
+    assert "ids" not in arguments(client, 0)
+
+
+def test_later_syncs_merge_recently_active_deltas(client):
+    client.responses.append(table(row(1, "One", [LABEL, "alice"]), row(2, "Two", [LABEL, "bob"])))
+    client._get_torrent_table()
+
+    client.responses.append(table(row(1, "One renamed", [LABEL, "alice"]), row(3, "Three", [LABEL, "alice"])))
+    assert names(client) == ["One renamed", "Three", "Two"]
+    assert arguments(client, 1)["ids"] == "recently-active"
+
+
+def test_removed_ids_leave_the_table_and_ownership_index(client):
+    client.responses.append(table(row(1, "One", [LABEL, "alice"]), row(2, "Two", [LABEL, "bob"])))
+    client._get_torrent_table()
+    assert client._ownership.owns("bob", 2)
+    assert client._ownership.owns("bob", "hash2")
+
+    client.responses.append(table(removed=[2]))
+    assert names(client) == ["One"]
+    assert not client._ownership.owns("bob", 2)
+    assert not client._ownership.owns("bob", "hash2")
+
+
+def test_relabelled_torrent_changes_owner(client):
+    client.responses.append(table(row(1, "One", [LABEL, "alice"])))
+    client._get_torrent_table()
+
+    client.responses.append(table(row(1, "One", [LABEL, "bob"])))
+    client._get_torrent_table()
+    assert client._ownership.owns("bob", 1)
+    assert not client._ownership.owns("alice", 1)
+
+
+def test_stale_table_falls_back_to_full_sync(client):
+    """Deltas only cover the last minute, so an older table is reloaded from scratch"""
+    client.responses.append(table(row(1, "One", [LABEL, "alice"]), row(2, "Two", [LABEL, "bob"])))
+    client._get_torrent_table()
+    client._last_sync = time.time() - TransmissionClient.RECENTLY_ACTIVE_WINDOW - 5
+
+    # Torrent 2 was removed long enough ago that no delta would mention it
+    client.responses.append(table(row(1, "One", [LABEL, "alice"])))
+    assert names(client) == ["One"]
+    assert "ids" not in arguments(client, 1)
+    assert not client._ownership.owns("bob", 2)
+
+
+def test_failed_sync_serves_last_known_state(client):
+    client.responses.append(table(row(1, "One", [LABEL, "alice"])))
+    client._get_torrent_table()
+
+    client.responses.append(None)
+    assert names(client) == ["One"]
+
+
+def test_never_synced_client_returns_nothing(client):
+    client.responses.append(None)
+    assert client.get_torrents(User(username="alice", role="user", id="alice")) == []
+
+
+def test_get_torrents_filters_by_owner(client):
+    client.responses.append(table(row(1, "One", [LABEL, "alice"]), row(2, "Two", [LABEL, "bob"])))
+
+    torrents = client.get_torrents(User(username="alice", role="user", id="alice"))
+    assert [torrent["id"] for torrent in torrents] == [1]
+
+
+def test_full_sync_swaps_the_ownership_index_in_whole(client):
+    """Access checks running during a full sync must keep seeing the previous, complete index"""
+    client.responses.append(table(row(1, "One", [LABEL, "alice"])))
+    client._get_torrent_table()
+    previous = client._ownership
+    client._last_sync = time.time() - TransmissionClient.RECENTLY_ACTIVE_WINDOW - 5
+
+    client.responses.append(table(row(1, "One", [LABEL, "alice"]), row(2, "Two", [LABEL, "bob"])))
+    client._get_torrent_table()
+    assert client._ownership is not previous
+    assert previous.owns("alice", 1)
+    assert client._ownership.owns("alice", 1) and client._ownership.owns("bob", 2)
@@ -0,0 +1,234 @@
+"""
+Tests for the upstream circuit breaker and its use by UpstreamSession / async_request.
+"""
+
+import asyncio
+import time
+
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from abb import upstream
+from abb.upstream import Backend, CircuitBreaker, CircuitOpenError, UpstreamSession, async_request
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def close(self):
+        pass
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """A retry-free backend whose breaker opens after 2 failures and cools down in 50ms"""
+    backend = Backend("test", connect_timeout=1, read_timeout=1, retries=0)
+    backend.breaker = CircuitBreaker("test", threshold=2, reset_after=0.05)
+    monkeypatch.setattr(upstream, "get_backend", lambda name: backend)
+    return backend
+
+
+@pytest.fixture
+def retrying(monkeypatch):
+    """Like backend, but with two quick retries"""
+    backend = Backend("test", connect_timeout=1, read_timeout=1, retries=2, backoff=0.001)
+    monkeypatch.setattr(upstream, "get_backend", lambda name: backend)
+    return backend
+
+
+def _refused():
+    reason = NewConnectionError(None, "Failed to establish a new connection: [Errno 111] Connection refused")
+    return requests.exceptions.ConnectionError(MaxRetryError(None, "/", reason))
+
+
+def _failing(monkeypatch, error):
+    """Make every request raise error; returns the list of attempted methods"""
+    calls = []
+
+    def fail(self, method, *args, **kwargs):
+        calls.append(method)
+        raise error
+
+    monkeypatch.setattr(requests.Session, "request", fail)
+    return calls
+
+
+def _open(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker("test", threshold=3, reset_after=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker("test", threshold=2, reset_after=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_a_single_probe_through():
+    breaker = CircuitBreaker("test", threshold=1, reset_after=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    # Everyone else keeps failing fast while the probe is out
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes_the_circuit():
+    breaker = CircuitBreaker("test", threshold=1, reset_after=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_probe_reopens_for_another_cool_down():
+    breaker = CircuitBreaker("test", threshold=1, reset_after=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+
+
+def test_released_probe_can_be_taken_again():
+    breaker = CircuitBreaker("test", threshold=1, reset_after=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.release_probe()
+    assert breaker.allow()
+
+
+def test_open_circuit_fails_fast(backend, monkeypatch):
+    calls = []
+    monkeypatch.setattr(requests.Session, "request", lambda self, *args, **kwargs: calls.append(1))
+    _open(backend.breaker)
+
+    with pytest.raises(CircuitOpenError):
+        UpstreamSession("test").get("http://upstream.invalid/")
+    assert calls == []
+
+
+def test_connection_errors_open_the_circuit(backend, monkeypatch):
+    def refuse(self, *args, **kwargs):
+        raise requests.exceptions.ConnectionError("refused")
+
+    monkeypatch.setattr(requests.Session, "request", refuse)
+    session = UpstreamSession("test")
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            session.get("http://upstream.invalid/")
+    assert backend.breaker.state == "open"
+
+
+def test_unexpected_error_during_probe_releases_it(backend, monkeypatch):
+    """Errors other than connect/read failures must not leave the breaker stuck half-open"""
+    def broken_body(self, *args, **kwargs):
+        raise requests.exceptions.ChunkedEncodingError("connection broken mid-body")
+
+    monkeypatch.setattr(requests.Session, "request", broken_body)
+    session = UpstreamSession("test")
+    _open(backend.breaker)
+    time.sleep(0.06)
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        session.get("http://upstream.invalid/")
+    # The probe counted as a failure; after the next cool-down another probe is allowed
+    assert backend.breaker.state == "open"
+    time.sleep(0.06)
+    assert backend.breaker.allow()
+
+
+def test_server_errors_do_not_open_the_circuit(backend, monkeypatch):
+    """A reachable backend answering 5xx (e.g. one broken indexer) isn't a transport failure"""
+    monkeypatch.setattr(requests.Session, "request", lambda self, *args, **kwargs: FakeResponse(500))
+    session = UpstreamSession("test")
+    for _ in range(5):
+        assert session.get("http://upstream.invalid/").status_code == 500
+    assert backend.breaker.state == "closed"
+
+
+def test_cancelled_async_probe_releases_it(backend, monkeypatch):
+    class HangingClient:
+        async def request(self, *args, **kwargs):
+            await asyncio.sleep(10)
+
+    monkeypatch.setattr(upstream, "get_async_client", lambda: HangingClient())
+    _open(backend.breaker)
+    time.sleep(0.06)
+
+    async def main():
+        task = asyncio.create_task(async_request("test", "GET", "http://upstream.invalid/"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    # Cancelled, not failed: the probe is handed back for the next caller
+    assert backend.breaker.allow()
+
+
+def test_refused_post_is_retried(retrying, monkeypatch):
+    """A refused connect never reached the server, so even a POST is safe to resend"""
+    calls = _failing(monkeypatch, _refused())
+    with pytest.raises(requests.exceptions.ConnectionError):
+        UpstreamSession("test").post("http://upstream.invalid/")
+    assert calls == ["POST"] * 3
+
+
+def test_post_dropped_mid_response_is_not_retried(retrying, monkeypatch):
+    """The server may already have acted on it"""
+    calls = _failing(monkeypatch, requests.exceptions.ConnectionError("Connection aborted: RemoteDisconnected"))
+    with pytest.raises(requests.exceptions.ConnectionError):
+        UpstreamSession("test").post("http://upstream.invalid/")
+    assert calls == ["POST"]
+
+
+def test_read_timeout_is_retried_for_idempotent_calls(retrying, monkeypatch):
+    calls = _failing(monkeypatch, requests.exceptions.ReadTimeout("read timed out"))
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        UpstreamSession("test").get("http://upstream.invalid/")
+    assert calls == ["GET"] * 3
+
+
+def test_jackett_read_timeout_fails_fast(retrying, monkeypatch):
+    retrying.retry_read_timeouts = False
+    calls = _failing(monkeypatch, requests.exceptions.ReadTimeout("read timed out"))
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        UpstreamSession("test").get("http://upstream.invalid/")
+    assert calls == ["GET"]
+
+
+def test_only_jackett_skips_read_timeout_retries(monkeypatch):
+    monkeypatch.setattr(upstream, "get_effective_config", lambda key: None)
+    upstream.reset_backends()
+    try:
+        assert not upstream.get_backend("jackett").retry_read_timeouts
+        assert upstream.get_backend("torrent").retry_read_timeouts
+    finally:
+        upstream.reset_backends()